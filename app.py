@@ -1,19 +1,29 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
-import google.generativeai as genai
-import bcrypt
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, Response, stream_with_context
+from werkzeug.middleware.proxy_fix import ProxyFix
+import click
 import json
 import os
+from datetime import datetime, timedelta
 from config import Config
 
 # Import from models instead of defining here
 from models import db, User, Job, JobMatch
-from utils.ai_processor import extract_resume_data, calculate_job_match, calculate_all_matches
+from utils.ai_processor import configure_gemini, extract_resume_data, calculate_job_match, calculate_all_matches, rescore_stale_matches, build_user_data, build_job_data, iter_job_matches, routing_report
 from utils.resume_parser import parse_resume, allowed_file
-from utils.matcher import get_user_matches, get_user_match_stats, get_missing_skills_analysis, update_all_user_matches
+from utils.matcher import get_user_matches, get_user_match_stats, get_missing_skills_analysis, update_all_user_matches, record_dashboard_view, get_match_summary, get_current_matches, needs_scoring, _load_json, mark_matches_stale, claim_scoring_run, release_scoring_run
+from utils.database import build_engine_options, add_missing_columns, ensure_unique_job_matches, bulk_save_matches
+from utils.search import setup_search_index, search_jobs
+from utils.resume_store import save_resume_text, has_resume
+from utils.retention import prune_matches, compact_resume_texts, vacuum_database, format_bytes
+from utils.auth import hash_password, check_password, needs_rehash, allow_login_attempt, HashingBusyError
 
-app = Flask(__name__)
+app = Flask(__name__, template_folder='templetes')
 app.config.from_object(Config)
 
+# Trust X-Forwarded-For from our own proxy so throttling sees client IPs
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
 # Database configuration
 if os.environ.get('DATABASE_URL'):
     # Production - Use Render PostgreSQL
@@ -24,10 +34,7 @@ else:
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'job_matching.db')
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_recycle': 300,
-    'pool_pre_ping': True
-}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
 # Initialize db with app
 db.init_app(app)
@@ -37,6 +44,9 @@ def initialize_database():
     with app.app_context():
         try:
             db.create_all()
+            add_missing_columns()
+            ensure_unique_job_matches()
+            setup_search_index()
             
             # Add sample jobs if none exist
             if db.session.query(Job).count() == 0:
@@ -78,7 +88,7 @@ def initialize_database():
 # Configure Gemini
 if app.config.get('GEMINI_API_KEY'):
     try:
-        genai.configure(api_key=app.config['GEMINI_API_KEY'])
+        configure_gemini()
         print("✅ Gemini AI configured successfully!")
     except Exception as e:
         print(f"❌ Gemini AI configuration error: {e}")
@@ -103,6 +113,10 @@ def register():
             password = request.form['password']
             name = request.form['name']
             
+            if not allow_login_attempt(request.remote_addr, email):
+                flash('Too many attempts. Please wait a minute and try again.', 'error')
+                return render_template('register.html'), 429
+            
             # Check if user exists
             existing_user = db.session.query(User).filter_by(email=email).first()
             if existing_user:
@@ -110,10 +124,9 @@ def register():
                 return redirect(url_for('register'))
             
             # Hash password and create user
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
             new_user = User(
                 email=email, 
-                password_hash=hashed_password.decode('utf-8'), 
+                password_hash=hash_password(password), 
                 name=name
             )
             
@@ -123,6 +136,11 @@ def register():
             flash('Registration successful. Please login.', 'success')
             return redirect(url_for('login'))
         
+        except HashingBusyError:
+            db.session.rollback()
+            flash('The server is busy. Please try again in a moment.', 'error')
+            return render_template('register.html'), 503
+        
         except Exception as e:
             db.session.rollback()
             flash('Registration failed. Please try again.', 'error')
@@ -136,9 +154,29 @@ def login():
         email = request.form['email']
         password = request.form['password']
         
+        # Reject abusive clients before any bcrypt work is done
+        if not allow_login_attempt(request.remote_addr, email):
+            flash('Too many login attempts. Please wait a minute and try again.', 'error')
+            return render_template('login.html'), 429
+        
         user = db.session.query(User).filter_by(email=email).first()
         
-        if user and bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
+        try:
+            valid = user is not None and check_password(password, user.password_hash)
+        except HashingBusyError:
+            flash('The server is busy. Please try again in a moment.', 'error')
+            return render_template('login.html'), 503
+        
+        if valid:
+            if needs_rehash(user.password_hash):
+                # Cost factor changed since this hash was made
+                try:
+                    user.password_hash = hash_password(password)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Password rehash error: {e}")
+            
             session['user_id'] = user.id
             session['user_name'] = user.name
             flash('Login successful!', 'success')
@@ -166,44 +204,15 @@ def dashboard():
         session.clear()
         return redirect(url_for('login'))
     
-    # Get job matches
-    matches = db.session.query(JobMatch).filter_by(user_id=user_id).order_by(JobMatch.match_percentage.desc()).limit(10).all()
+    # Top matches and stats come from the precomputed per-user summary
+    matches_list = get_user_matches(user_id)
+    stats = get_user_match_stats(user_id)
+    record_dashboard_view(user_id)
     
-    # Convert to list of dicts for template
-    matches_list = []
-    for match in matches:
-        job = db.session.get(Job, match.job_id)
-        if job:
-            # Parse JSON strings safely
-            matched_skills = []
-            missing_skills = []
-            
-            try:
-                if match.matched_skills:
-                    matched_skills = json.loads(match.matched_skills)
-            except (json.JSONDecodeError, TypeError):
-                matched_skills = []
-            
-            try:
-                if match.missing_skills:
-                    missing_skills = json.loads(match.missing_skills)
-            except (json.JSONDecodeError, TypeError):
-                missing_skills = []
-            
-            matches_list.append({
-                'id': job.id,
-                'title': job.title,
-                'company': job.company,
-                'description': job.description,
-                'location': job.location,
-                'salary_range': job.salary_range,
-                'match_percentage': match.match_percentage or 0,
-                'matched_skills': matched_skills,
-                'missing_skills': missing_skills,
-                'fit_summary': match.fit_summary or "No summary available"
-            })
+    # The page streams fresh matches from /matches/stream while any are missing or stale
+    scoring = has_resume(user_id) and needs_scoring(user_id)
     
-    return render_template('dashboard.html', user=user, matches=matches_list)
+    return render_template('dashboard.html', user=user, matches=matches_list, stats=stats, scoring=scoring)
 
 @app.route('/profile', methods=['GET', 'POST'])
 def profile():
@@ -237,7 +246,7 @@ def profile():
             flash('Error updating profile. Please try again.', 'error')
             print(f"Profile update error: {e}")
     
-    return render_template('profile.html', user=user)
+    return render_template('profile.html', user=user, has_resume=has_resume(user_id))
 
 @app.route('/upload-resume', methods=['GET', 'POST'])
 def upload_resume():
@@ -279,14 +288,15 @@ def upload_resume():
             user.skills = json.dumps(extracted_data.get('skills', []))
             user.experience = json.dumps(extracted_data.get('experience', []))
             user.education = json.dumps(extracted_data.get('education', []))
-            user.resume_text = resume_text
+            save_resume_text(user.id, resume_text)
+            user.resume_text = None
+            # Scores against the old resume stay visible until they are rescored
+            mark_matches_stale(user.id)
             
             db.session.commit()
             
-            # Calculate matches for all jobs
-            calculate_all_matches(user_id)
-            
-            flash('Resume uploaded and processed successfully! AI has analyzed your skills and found job matches.', 'success')
+            # Stale matches are rescored by /matches/stream while the dashboard shows them
+            flash('Resume uploaded and processed successfully! AI is now scoring your job matches.', 'success')
             return redirect(url_for('dashboard'))
         
         except Exception as e:
@@ -296,14 +306,132 @@ def upload_resume():
     
     return render_template('upload_resume.html')
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _match_event(card, match_result, scored, total):
+    return _sse('match', dict(
+        card,
+        match_percentage=match_result['match_percentage'],
+        matched_skills=match_result['matched_skills'],
+        missing_skills=match_result['missing_skills'],
+        fit_summary=match_result['fit_summary'],
+        scored=scored,
+        total=total
+    ))
+
+@app.route('/matches/stream')
+def stream_matches():
+    """Stream the user's matches as server-sent events, scoring stale or missing ones
+
+    Matches already scored by the current SCORER_VERSION are sent as they
+    are. Only one run per user may score at a time; others get a 'busy'
+    event.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    user_id = session['user_id']
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    claim = claim_scoring_run(user_id)
+    if claim is None:
+        return Response(_sse('busy', {}), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    
+    def release():
+        with app.app_context():
+            release_scoring_run(user_id, claim)
+    
+    try:
+        user_data = build_user_data(user)
+        jobs = db.session.query(Job).all()
+        current = {
+            match.job_id: {
+                'match_percentage': match.match_percentage or 0,
+                'matched_skills': _load_json(match.matched_skills, []),
+                'missing_skills': _load_json(match.missing_skills, []),
+                'fit_summary': match.fit_summary or ''
+            }
+            for match in get_current_matches(user_id)
+        }
+        jobs_data = [build_job_data(job) for job in jobs if job.id not in current]
+        cards = {
+            job.id: {
+                'id': job.id,
+                'title': job.title,
+                'company': job.company,
+                'location': job.location,
+                'salary_range': job.salary_range,
+                'description': (job.description or '')[:150]
+            }
+            for job in jobs
+        }
+        # Give the connection back to the pool; each write below opens a short session
+        db.session.remove()
+    except Exception:
+        db.session.rollback()
+        release()
+        raise
+    
+    def generate():
+        total = len(jobs)
+        results = []
+        yield _sse('start', {'total': total})
+        for scored, (job_id, match_result) in enumerate(current.items(), 1):
+            yield _match_event(cards[job_id], match_result, scored, total)
+        
+        # Jobs left unscored by a closed stream stay stale for the next run
+        for scored, (job_id, match_result) in enumerate(iter_job_matches(user_data, jobs_data), len(current) + 1):
+            results.append((job_id, match_result))
+            try:
+                bulk_save_matches(user_id, [(job_id, match_result)])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Match stream write error: {e}")
+            finally:
+                db.session.remove()
+            
+            yield _match_event(cards[job_id], match_result, scored, total)
+        if results:
+            print(routing_report(results))
+        yield _sse('done', {'scored': total, 'total_matches': get_match_summary(user_id).total_matches})
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs however the response ends: finished, failed or the client went away
+    response.call_on_close(release)
+    return response
+
 @app.route('/jobs')
 def jobs():
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = app.config['JOBS_PER_PAGE']
+    
     try:
-        jobs = db.session.query(Job).order_by(Job.created_at.desc()).all()
+        if query:
+            results, total = search_jobs(
+                query,
+                page=page,
+                per_page=per_page,
+                user_id=session.get('user_id'),
+                match_weight=app.config['SEARCH_MATCH_WEIGHT']
+            )
+        else:
+            total = db.session.query(Job).count()
+            page_jobs = db.session.query(Job).order_by(Job.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+            results = [{'job': job, 'relevance': None, 'match_percentage': None} for job in page_jobs]
         
         # Parse required_skills for each job
         jobs_data = []
-        for job in jobs:
+        for result in results:
+            job = result['job']
             try:
                 skills = json.loads(job.required_skills) if job.required_skills else []
             except (json.JSONDecodeError, TypeError):
@@ -318,16 +446,19 @@ def jobs():
                 'experience_required': job.experience_required,
                 'location': job.location,
                 'salary_range': job.salary_range,
-                'created_at': job.created_at
+                'created_at': job.created_at,
+                'match_percentage': result['match_percentage']
             }
             jobs_data.append(job_dict)
         
-        return render_template('jobs.html', jobs=jobs_data)
+        total_pages = max(1, (total + per_page - 1) // per_page)
+        return render_template('jobs.html', jobs=jobs_data, query=query, page=page, total=total, total_pages=total_pages)
     
     except Exception as e:
+        db.session.rollback()
         flash('Error loading jobs.', 'error')
         print(f"Jobs error: {e}")
-        return render_template('jobs.html', jobs=[])
+        return render_template('jobs.html', jobs=[], query=query, page=1, total=0, total_pages=1)
 
 @app.route('/job/<int:job_id>')
 def job_detail(job_id):
@@ -410,6 +541,42 @@ def add_job():
             print(f"Add job error: {e}")
             return redirect(url_for('admin'))
 
+@app.cli.command('rescore-stale')
+@click.option('--older-than-days', type=int, help='Rescore matches last scored more than this many days ago.')
+@click.option('--min-version', type=int, help='Rescore matches produced by a scorer version below this.')
+@click.option('--max-users', type=int, help='Only rescore this many users (most active first).')
+def rescore_stale_command(older_than_days, min_version, max_users):
+    """Rescore stale job matches (defaults to versions below SCORER_VERSION)"""
+    older_than = datetime.utcnow() - timedelta(days=older_than_days) if older_than_days is not None else None
+    users, rescored = rescore_stale_matches(older_than, min_version, max_users)
+    print(f"✅ Rescored {rescored} matches for {users} users")
+
+@app.cli.command('compact-storage')
+@click.option('--min-match', type=float, help='Prune matches scoring below this percentage.')
+@click.option('--job-age-days', type=int, help='Prune matches for jobs posted more than this many days ago.')
+@click.option('--archive/--delete', default=True, help='Keep a compact copy of pruned matches (default) or drop them.')
+@click.option('--batch-size', type=int, default=1000, show_default=True)
+@click.option('--vacuum', is_flag=True, help='VACUUM afterwards so SQLite returns the space to the OS.')
+def compact_storage_command(min_match, job_age_days, archive, batch_size, vacuum):
+    """Prune or archive stale matches and compress inline resume text"""
+    reclaimed = 0
+    
+    if min_match is not None or job_age_days is not None:
+        jobs_before = datetime.utcnow() - timedelta(days=job_age_days) if job_age_days is not None else None
+        pruned = prune_matches(min_match, jobs_before, archive=archive, batch_size=batch_size)
+        reclaimed += pruned['bytes_freed']
+        print(f"{'Archived' if archive else 'Deleted'} {pruned['rows']} matches for {pruned['users']} users "
+              f"(~{format_bytes(pruned['bytes_freed'])} out of job_match)")
+    
+    resumes = compact_resume_texts()
+    reclaimed += resumes['bytes_before'] - resumes['bytes_after']
+    print(f"Moved {resumes['users']} resumes out of the user table: "
+          f"{format_bytes(resumes['bytes_before'])} -> {format_bytes(resumes['bytes_after'])} compressed")
+    
+    if vacuum and vacuum_database():
+        print("VACUUM complete")
+    print(f"✅ Reclaimed about {format_bytes(reclaimed)}")
+
 # Initialize database when app starts
 initialize_database()
 
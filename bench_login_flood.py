@@ -0,0 +1,120 @@
+"""Measure /dashboard latency while /login is flooded with bad passwords
+
+Usage: python bench_login_flood.py [flood_threads] [seconds]
+
+Runs the app in-process on a threaded server backed by a temporary SQLite
+database. The flood rotates X-Forwarded-For addresses and targets a pool of
+real accounts, so it has to get past the per-IP buckets and reach bcrypt;
+the per-email buckets and the bounded hashing pool are what keep the
+dashboard responsive. For an unprotected baseline, run with
+LOGIN_IP_BURST=1000000 LOGIN_EMAIL_BURST=1000000 HASH_QUEUE_LIMIT=1000.
+"""
+import http.cookiejar
+import logging
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_login.db'))
+os.environ.setdefault('TRUSTED_PROXIES', '1')
+
+from werkzeug.serving import make_server
+from app import app
+
+NUM_ACCOUNTS = 20
+
+def post(opener, url, data, headers=None):
+    request = urllib.request.Request(url, data=urllib.parse.urlencode(data).encode(), headers=headers or {})
+    try:
+        with opener.open(request) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 'error'
+
+def timed_get(opener, url):
+    started = time.perf_counter()
+    with opener.open(url) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+def measure_dashboard(opener, base_url, seconds):
+    timings = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        timings.append(timed_get(opener, base_url + '/dashboard'))
+        time.sleep(0.05)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1], len(timings)
+
+def flood_worker(base_url, stop, statuses, lock):
+    opener = urllib.request.build_opener()
+    rng = random.Random()
+    while not stop.is_set():
+        headers = {'X-Forwarded-For': f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"}
+        status = post(opener, base_url + '/login', {
+            'email': f"user{rng.randrange(NUM_ACCOUNTS)}@example.com",
+            'password': 'wrong-password'
+        }, headers)
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+
+def flood(base_url, flood_threads, seconds, results):
+    """Run the flood in its own process so client threads don't share our GIL"""
+    stop = threading.Event()
+    statuses = {}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=flood_worker, args=(base_url, stop, statuses, lock), daemon=True)
+               for _ in range(flood_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    results.put(statuses)
+
+def main():
+    flood_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    server.socket.listen(256)  # socketserver's default backlog of 5 drops flood connections
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    setup = urllib.request.build_opener()
+    for i in range(NUM_ACCOUNTS):
+        post(setup, base_url + '/register', {'email': f"user{i}@example.com", 'password': 'secret', 'name': f"User {i}"},
+             {'X-Forwarded-For': f"192.168.0.{i + 1}"})
+
+    viewer = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    post(viewer, base_url + '/register', {'email': 'viewer@example.com', 'password': 'secret', 'name': 'Viewer'})
+    post(viewer, base_url + '/login', {'email': 'viewer@example.com', 'password': 'secret'})
+
+    p50, p95, count = measure_dashboard(viewer, base_url, seconds / 2)
+    print(f"dashboard idle:   p50 {p50:6.1f}ms  p95 {p95:6.1f}ms  ({count} requests)")
+
+    results = multiprocessing.Queue()
+    flooder = multiprocessing.Process(target=flood, args=(base_url, flood_threads, seconds + 1, results))
+    flooder.start()
+    time.sleep(1)
+
+    p50, p95, count = measure_dashboard(viewer, base_url, seconds)
+    statuses = results.get()
+    flooder.join()
+    print(f"dashboard flood:  p50 {p50:6.1f}ms  p95 {p95:6.1f}ms  ({count} requests)")
+    print(f"login responses during flood: {dict(sorted(statuses.items(), key=str))}")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
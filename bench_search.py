@@ -0,0 +1,83 @@
+"""Benchmark /jobs?q= search latency against a large synthetic job table
+
+Usage: python bench_search.py [num_jobs] [database_url]
+
+Defaults to 100,000 jobs in a temporary SQLite database. Pass a PostgreSQL
+URL to benchmark the tsvector/GIN path instead (the job table is dropped
+and recreated, so never point this at a real database).
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from flask import Flask
+from models import db, Job
+from utils.database import build_engine_options
+from utils.search import setup_search_index, search_jobs
+
+TITLES = ['Python Developer', 'Frontend Engineer', 'Data Scientist', 'DevOps Engineer', 'Product Manager',
+          'Backend Engineer', 'Mobile Developer', 'QA Analyst', 'Machine Learning Engineer', 'Site Reliability Engineer']
+SKILLS = ['Python', 'Flask', 'Django', 'SQL', 'PostgreSQL', 'React', 'TypeScript', 'AWS', 'Docker', 'Kubernetes',
+          'Pandas', 'Machine Learning', 'Go', 'Rust', 'Java', 'Spring', 'Terraform', 'GraphQL', 'Redis', 'Kafka']
+WORDS = ['build', 'scalable', 'services', 'team', 'customers', 'data', 'pipelines', 'platform', 'design',
+         'ship', 'features', 'remote', 'collaborate', 'ownership', 'performance', 'reliability', 'cloud', 'apis']
+# Filler vocabulary so descriptions have a realistic spread of rare terms
+FILLER = [f"term{i}" for i in range(5000)]
+QUERIES = ['python', 'react typescript', 'machine learning', 'kubernetes aws', 'data pipelines', 'rust', 'senior backend']
+
+def build_app(database_url):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(database_url)
+    db.init_app(app)
+    return app
+
+def populate(num_jobs, batch_size=5000):
+    rng = random.Random(42)
+    for start in range(0, num_jobs, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, num_jobs)):
+            rows.append({
+                'title': f"{rng.choice(['Senior ', 'Junior ', ''])}{rng.choice(TITLES)}",
+                'company': f"Company {i % 5000}",
+                'description': ' '.join(rng.choice(WORDS) if rng.random() < 0.1 else rng.choice(FILLER) for _ in range(80)),
+                'required_skills': json.dumps(rng.sample(SKILLS, 5)),
+                'experience_required': f"{rng.randint(0, 5)}-{rng.randint(6, 10)} years",
+                'location': 'Remote',
+                'salary_range': '$80,000 - $120,000'
+            })
+        db.session.bulk_insert_mappings(Job, rows)
+        db.session.commit()
+
+def main():
+    num_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    if len(sys.argv) > 2:
+        database_url = sys.argv[2]
+    else:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_search.db')
+
+    app = build_app(database_url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        setup_search_index()
+
+        started = time.perf_counter()
+        populate(num_jobs)
+        print(f"Inserted {num_jobs} jobs in {time.perf_counter() - started:.1f}s")
+
+        for query in QUERIES:
+            timings = []
+            for page in (1, 2, 3) * 10:
+                started = time.perf_counter()
+                results, total = search_jobs(query, page=page, per_page=20)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            print(f"{query!r:24} {total:>7} hits  p50 {statistics.median(timings):6.1f}ms  "
+                  f"p95 {timings[int(len(timings) * 0.95) - 1]:6.1f}ms")
+
+if __name__ == '__main__':
+    main()
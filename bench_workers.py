@@ -0,0 +1,220 @@
+"""Compare gunicorn worker models on /dashboard and /upload-resume
+
+Usage: python bench_workers.py [clients] [seconds] [worker_class ...]
+
+Starts gunicorn with gunicorn.conf.py once per worker class (default: sync
+gthread gevent), each against a fresh temporary SQLite database and with
+Gemini replaced by a fake that sleeps FAKE_LLM_LATENCY seconds (default 0.8)
+before answering. Every client logs in as its own user and loops: mostly
+dashboard views, and every UPLOAD_EVERY-th request a resume upload followed
+by the /matches/stream the dashboard opens afterwards. Reports throughput
+and p50/p95/p99 latency per endpoint. WEB_CONCURRENCY, GUNICORN_THREADS
+and the other gunicorn.conf.py settings are passed through.
+"""
+import http.cookiejar
+import io
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+FAKE_LLM_LATENCY = float(os.getenv('FAKE_LLM_LATENCY', 0.8))
+UPLOAD_EVERY = int(os.getenv('UPLOAD_EVERY', 10))
+CLIENT_PROCESSES = 4
+
+# Valid for both the resume extraction and the match prompt
+FAKE_REPLY = {
+    'name': 'Bench User',
+    'email': 'bench@example.com',
+    'phone': '+1234567890',
+    'skills': ['Python', 'Flask', 'SQL', 'React'],
+    'experience': [{'role': 'Software Engineer', 'company': 'Tech Corp', 'duration': '2019-2023',
+                    'description': 'Built web applications'}],
+    'education': [{'degree': 'BS Computer Science', 'institution': 'University', 'year': '2019'}],
+    'summary': 'Backend developer.',
+    'match_percentage': 60,
+    'matched_skills': ['Python'],
+    'missing_skills': ['Docker'],
+    'fit_summary': 'Partial match on the core stack.'
+}
+
+def fake_generate_json(prompt):
+    """Stand-in for a Gemini call: wait like one, then answer"""
+    time.sleep(FAKE_LLM_LATENCY)  # cooperative once gevent has patched time
+    return dict(FAKE_REPLY)
+
+def create_app():
+    """WSGI entry point for the benchmarked server: the real app with fake Gemini"""
+    import utils.ai_processor
+    from app import app
+    utils.ai_processor._generate_json = fake_generate_json
+    return app
+
+def build_resume():
+    from docx import Document
+    document = Document()
+    document.add_heading('Bench User', 0)
+    document.add_paragraph('Software engineer with five years of Python, Flask, SQL and React experience.')
+    document.add_paragraph('Tech Corp, Software Engineer, 2019-2023: built and operated web applications.')
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Time each request on its own instead of following the redirect"""
+    def redirect_request(self, *args):
+        return None
+
+def request(opener, url, data=None, headers=None):
+    started = time.perf_counter()
+    try:
+        with opener.open(urllib.request.Request(url, data=data, headers=headers or {}), timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = 'error'
+    return status, (time.perf_counter() - started) * 1000
+
+def multipart(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/vnd.openxmlformats-officedocument.wordprocessingml.document\r\n\r\n").encode()
+    body += content + f"\r\n--{boundary}--\r\n".encode()
+    return body, {'Content-Type': f"multipart/form-data; boundary={boundary}"}
+
+def client(base_url, client_id, resume, ready, go, deadline, samples, lock):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect)
+    email = f"client{client_id}@example.com"
+    form = urllib.parse.urlencode({'email': email, 'password': 'secret', 'name': f"Client {client_id}"}).encode()
+    request(opener, base_url + '/register', form)
+    request(opener, base_url + '/login', form)
+    body, headers = multipart('resume', 'resume.docx', resume)
+    ready.release()
+    go.wait()
+
+    count = random.randrange(UPLOAD_EVERY)
+    local = []
+    while time.time() < deadline.value:
+        count += 1
+        if count % UPLOAD_EVERY == 0:
+            local.append(('upload-resume',) + request(opener, base_url + '/upload-resume', body, headers))
+            local.append(('matches/stream',) + request(opener, base_url + '/matches/stream'))
+        else:
+            local.append(('dashboard',) + request(opener, base_url + '/dashboard'))
+    with lock:
+        samples.extend(local)
+
+def client_process(base_url, client_ids, resume, ready, go, deadline, results):
+    """Run a share of the clients in their own process so they don't share our GIL"""
+    samples = []
+    lock = threading.Lock()
+    threads = [threading.Thread(target=client, args=(base_url, client_id, resume, ready, go, deadline, samples, lock))
+               for client_id in client_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(samples)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(worker_class, workdir):
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        'GUNICORN_WORKER_CLASS': worker_class,
+        'PORT': str(port),
+        'DATABASE_URL': 'sqlite:///' + os.path.join(workdir, f"bench_{worker_class}.db"),
+        'GEMINI_API_KEY': 'fake',
+        # Setup logs every client in from one address at a low bcrypt cost
+        'BCRYPT_ROUNDS': '4',
+        'LOGIN_IP_BURST': '100000'
+    })
+    log = open(os.path.join(workdir, f"gunicorn_{worker_class}.log"), 'w')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'bench_workers:create_app()'],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited, see {log.name}")
+        if request(urllib.request.build_opener(), base_url + '/login')[0] == 200:
+            return server, base_url
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"gunicorn did not start, see {log.name}")
+
+def percentile(timings, fraction):
+    return timings[max(0, int(len(timings) * fraction) - 1)]
+
+def report(worker_class, samples, seconds):
+    print(f"\n{worker_class}: {len(samples) / seconds:.1f} req/s overall")
+    for endpoint, expected in (('dashboard', 200), ('upload-resume', 302), ('matches/stream', 200)):
+        rows = [(status, ms) for name, status, ms in samples if name == endpoint]
+        if not rows:
+            continue
+        timings = sorted(ms for _, ms in rows)
+        failed = sum(1 for status, _ in rows if status != expected)
+        print(f"  {endpoint:15} {len(rows) / seconds:7.1f} req/s  p50 {statistics.median(timings):7.1f}ms  "
+              f"p95 {percentile(timings, 0.95):7.1f}ms  p99 {percentile(timings, 0.99):7.1f}ms  failed {failed}")
+
+def run(worker_class, clients, seconds, resume, workdir):
+    server, base_url = start_server(worker_class, workdir)
+    try:
+        ready = multiprocessing.Semaphore(0)
+        go = multiprocessing.Event()
+        deadline = multiprocessing.Value('d', 0)
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=client_process, args=(
+                base_url, range(i, clients, CLIENT_PROCESSES), resume, ready, go, deadline, results))
+            for i in range(min(CLIENT_PROCESSES, clients))
+        ]
+        for process in processes:
+            process.start()
+        for _ in range(clients):
+            ready.acquire()
+
+        deadline.value = time.time() + seconds
+        go.set()
+        samples = []
+        for _ in processes:
+            samples.extend(results.get())
+        for process in processes:
+            process.join()
+        report(worker_class, samples, seconds)
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 15
+    worker_classes = sys.argv[3:] or ['sync', 'gthread', 'gevent']
+
+    print(f"{clients} clients for {seconds:.0f}s per worker class, fake Gemini latency {FAKE_LLM_LATENCY}s, "
+          f"WEB_CONCURRENCY={os.getenv('WEB_CONCURRENCY', 2)}")
+    resume = build_resume()
+    workdir = tempfile.mkdtemp()
+    for worker_class in worker_classes:
+        run(worker_class, clients, seconds, resume, workdir)
+    print(f"\nServer logs in {workdir}")
+
+if __name__ == '__main__':
+    main()
@@ -8,7 +8,54 @@ class Config:
     
     # Gemini API
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+    # REST is safe after fork and under gevent; grpc channels are neither
+    GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT', 'rest')
+    
+    # Bump whenever the match prompt or scoring logic changes so existing
+    # JobMatch rows show up as stale and can be rescored selectively
+    SCORER_VERSION = int(os.getenv('SCORER_VERSION', 1))
+    
+    # Scoring router: the local scorer decides matches at or below LOW or at
+    # or above HIGH when its confidence is high enough; the rest go to Gemini
+    ROUTER_LOW_THRESHOLD = float(os.getenv('ROUTER_LOW_THRESHOLD', 25))
+    ROUTER_HIGH_THRESHOLD = float(os.getenv('ROUTER_HIGH_THRESHOLD', 85))
+    ROUTER_MIN_CONFIDENCE = float(os.getenv('ROUTER_MIN_CONFIDENCE', 0.75))
+    # Below this confidence a local estimate is not shown in place of a
+    # Gemini score (no API key, or the call failed)
+    ROUTER_FALLBACK_MIN_CONFIDENCE = float(os.getenv('ROUTER_FALLBACK_MIN_CONFIDENCE', 0.5))
+    
+    # Concurrent Gemini calls per scoring run
+    SCORING_MAX_IN_FLIGHT = int(os.getenv('SCORING_MAX_IN_FLIGHT', 4))
+    # A scoring run that never released its claim is taken over after this
+    SCORING_LEASE_SECONDS = int(os.getenv('SCORING_LEASE_SECONDS', 900))
+    # Dashboard view counts are buffered per worker and written this often
+    DASHBOARD_VIEW_FLUSH_SECONDS = float(os.getenv('DASHBOARD_VIEW_FLUSH_SECONDS', 60))
+    
+    # Prompt token budgets
+    RESUME_TOKEN_BUDGET = int(os.getenv('RESUME_TOKEN_BUDGET', 1200))
+    CANDIDATE_TOKEN_BUDGET = int(os.getenv('CANDIDATE_TOKEN_BUDGET', 300))
+    JOB_TOKEN_BUDGET = int(os.getenv('JOB_TOKEN_BUDGET', 300))
     
     # File upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'pdf', 'docx'}
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'pdf', 'docx'}
+    
+    # Job search
+    JOBS_PER_PAGE = int(os.getenv('JOBS_PER_PAGE', 20))
+    SEARCH_MATCH_WEIGHT = float(os.getenv('SEARCH_MATCH_WEIGHT', 0.3))
+    
+    # Password hashing (cost changes are applied to existing users on login)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    HASH_WORKERS = int(os.getenv('HASH_WORKERS', 2))
+    HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', 8))
+    HASH_TIMEOUT = int(os.getenv('HASH_TIMEOUT', 10))
+    
+    # Login throttling (token buckets per client IP and per email)
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', 20))
+    LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', 10))
+    LOGIN_EMAIL_BURST = int(os.getenv('LOGIN_EMAIL_BURST', 5))
+    LOGIN_EMAIL_PER_MINUTE = float(os.getenv('LOGIN_EMAIL_PER_MINUTE', 3))
+    
+    # Number of reverse proxies in front of the app (Render has one)
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 0))
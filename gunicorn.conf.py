@@ -0,0 +1,64 @@
+"""Gunicorn settings, overridable from the environment
+
+GUNICORN_WORKER_CLASS selects the worker model:
+- gthread (default): WEB_CONCURRENCY processes x GUNICORN_THREADS threads
+- gevent: one event loop per process serving GUNICORN_WORKER_CONNECTIONS
+  requests at once; DB connections are capped by DB_POOL_SIZE
+- sync: one request at a time per process
+
+Compare them locally with bench_workers.py.
+"""
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app imports sockets, locks and the DB driver
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+
+# utils.database sizes each worker's connection pool from GUNICORN_THREADS;
+# greenlets share a fixed pool instead of one connection each
+os.environ['GUNICORN_THREADS'] = str(threads)
+if worker_class == 'gevent':
+    os.environ.setdefault('DB_POOL_SIZE', '10')
+
+# Sync workers are killed when one request runs past this (a slow Gemini
+# call or a long /matches/stream); threaded and gevent workers heartbeat
+# independently of their requests
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers now and then so slow leaks can't accumulate
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Import the app once in the master: tables and indexes are set up by a
+# single process and workers share its memory pages
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if os.path.isdir('/dev/shm'):
+    # Heartbeat files on disk can stall workers on slow container filesystems
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+def post_fork(server, worker):
+    """Give each worker its own DB connections and Gemini client"""
+    if not server.cfg.preload_app:
+        return
+    from app import app
+    from models import db
+    from utils.ai_processor import configure_gemini
+    with app.app_context():
+        # Leave the master's pooled connections alone but never reuse them here
+        db.engine.dispose(close=False)
+    configure_gemini()
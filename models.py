@@ -1,5 +1,6 @@
 # models.py
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import deferred
 
 db = SQLAlchemy()
 
@@ -14,7 +15,8 @@ class User(db.Model):
     education = db.Column(db.Text)
     preferred_location = db.Column(db.String(255))
     expected_salary = db.Column(db.String(100))
-    resume_text = db.Column(db.Text)
+    # Legacy inline copy; resumes live compressed in ResumeBlob (utils/resume_store.py)
+    resume_text = deferred(db.Column(db.Text))
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
 
 class Job(db.Model):
@@ -29,6 +31,10 @@ class Job(db.Model):
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
 
 class JobMatch(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'job_id', name='uq_job_match_user_job'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     job_id = db.Column(db.Integer, db.ForeignKey('job.id'))
@@ -36,4 +42,35 @@ class JobMatch(db.Model):
     matched_skills = db.Column(db.Text)
     missing_skills = db.Column(db.Text)
     fit_summary = db.Column(db.Text)
+    scorer_version = db.Column(db.Integer, default=0)  # Config.SCORER_VERSION that produced the score, 0 if scoring failed, -1 if awaiting a rescore
+    model_name = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+class UserMatchSummary(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_matches = db.Column(db.Integer, default=0)
+    match_sum = db.Column(db.Float, default=0)
+    average_match = db.Column(db.Float, default=0)
+    best_match = db.Column(db.Float, default=0)
+    top_matches = db.Column(db.Text)  # JSON [[job_id, match_percentage], ...], best first
+    missing_skill_counts = db.Column(db.Text)  # JSON {skill: count} over matches below 80%
+    top_missing_skills = db.Column(db.Text)  # JSON list of the most common missing skills
+    dashboard_views = db.Column(db.Integer, default=0)
+    scoring_started_at = db.Column(db.DateTime)  # set while a /matches/stream run owns this user's scoring
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+class ResumeBlob(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    compressed_text = db.Column(db.LargeBinary)  # zlib-compressed UTF-8 resume text
+    original_size = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+class JobMatchArchive(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)
+    job_id = db.Column(db.Integer)
+    match_percentage = db.Column(db.Float)
+    scorer_version = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=db.func.current_timestamp())
@@ -0,0 +1,43 @@
+from config import Config
+from utils import ai_processor
+from utils.local_scorer import score_match
+
+PYTHON_JOB = {
+    'id': 1,
+    'title': 'Python Developer',
+    'required_skills': ['Python', 'Flask', 'SQL', 'REST API', 'Git'],
+    'experience_required': '2-4 years',
+    'location': 'Remote',
+    'description': ''
+}
+
+def test_candidate_without_skills_scores_zero_on_skills():
+    result = score_match({'skills': [], 'experience': []}, PYTHON_JOB)
+    # Only skills (0) and location (remote fits) are known
+    assert result['match_percentage'] == 20.0
+    assert result['missing_skills'] == PYTHON_JOB['required_skills']
+
+def test_matching_skills_raise_the_score():
+    result = score_match({'skills': ['python', 'Flask', 'SQL', 'Git', 'REST API']}, PYTHON_JOB)
+    assert result['match_percentage'] == 100.0
+    assert result['matched_skills'] == PYTHON_JOB['required_skills']
+
+def test_offline_estimate_is_marked_stale(monkeypatch):
+    monkeypatch.setattr(Config, 'GEMINI_API_KEY', None)
+    user = {'skills': ['Python', 'Flask'], 'experience': [{'duration': '2020 - 2023'}], 'preferred_location': 'Remote'}
+    result = ai_processor.score_job_match(user, PYTHON_JOB)
+    assert result['route'] == 'offline'
+    assert result['error'] is True
+    assert result['match_percentage'] > 0
+
+def test_low_confidence_fallback_is_not_stored_as_a_score(monkeypatch):
+    monkeypatch.setattr(Config, 'GEMINI_API_KEY', 'key')
+    monkeypatch.setattr(ai_processor, 'calculate_job_match', lambda user_data, job_data: {
+        'match_percentage': 0, 'matched_skills': [], 'missing_skills': [],
+        'fit_summary': 'Error calculating match', 'error': True
+    })
+    job = dict(PYTHON_JOB, required_skills=[], experience_required=None, location=None)
+    result = ai_processor.score_job_match({'skills': ['Python']}, job)
+    assert result['route'] == 'fallback'
+    assert result['error'] is True
+    assert result['fit_summary'] == 'Error calculating match'
@@ -0,0 +1,69 @@
+import os
+import pytest
+from utils.prompt_builder import compact_resume_text, estimate_tokens
+
+RESUMES_DIR = os.path.join(os.path.dirname(__file__), 'resumes')
+
+def load_resume(name):
+    with open(os.path.join(RESUMES_DIR, name)) as f:
+        return f.read()
+
+CORPUS = sorted(os.listdir(RESUMES_DIR))
+
+@pytest.mark.parametrize('name', CORPUS)
+@pytest.mark.parametrize('budget', [40, 80, 150, 1200])
+def test_tokens_after_within_budget(name, budget):
+    compacted, stats = compact_resume_text(load_resume(name), budget)
+    assert stats['tokens_after'] <= budget
+    assert stats['tokens_after'] == estimate_tokens(compacted)
+    assert stats['tokens_before'] == estimate_tokens(load_resume(name))
+
+@pytest.mark.parametrize('name, skills_line', [
+    ('two_page.txt', 'Python, Flask, PostgreSQL, Docker, AWS'),
+    ('long_experience.txt', 'Java, Spring, Kubernetes, Terraform, Kafka'),
+    ('boilerplate.txt', 'Python, Pandas, scikit-learn, SQL, Statistics'),
+])
+def test_skills_survive_small_budget(name, skills_line):
+    # The skills section comes after the experience block in two of these
+    resume = load_resume(name)
+    budget = estimate_tokens(resume) // 4
+    compacted, _ = compact_resume_text(resume, budget)
+    assert skills_line in compacted
+
+def test_most_recent_roles_kept_first():
+    compacted, _ = compact_resume_text(load_resume('long_experience.txt'), 200)
+    assert 'Company 1\n' in compacted
+    assert 'Company 2\n' in compacted
+    assert 'Company 10' not in compacted
+
+def test_boilerplate_removed():
+    compacted, _ = compact_resume_text(load_resume('boilerplate.txt'), 1200)
+    assert 'Curriculum Vitae' not in compacted
+    assert 'References available' not in compacted
+    assert '____' not in compacted
+    assert '----' not in compacted
+    assert 'Retail Analytics Ltd' in compacted
+
+def test_running_headers_and_page_footers_removed():
+    compacted, _ = compact_resume_text(load_resume('two_page.txt'), 1200)
+    assert 'Page 1 of 2' not in compacted
+    assert 'Page 2 of 2' not in compacted
+    assert compacted.count('Jane Doe - Resume') == 1
+
+def test_repeated_content_lines_kept():
+    compacted, _ = compact_resume_text(load_resume('two_page.txt'), 1200)
+    assert compacted.count('Software Engineer') == 2
+    assert 'Software Engineer\nBeta Inc\n2018 - 2021\n- Maintained ETL pipelines' in compacted
+
+def test_text_without_headings_is_kept_as_header():
+    resume = load_resume('no_headings.txt')
+    compacted, _ = compact_resume_text(resume, 1200)
+    assert compacted == resume.strip()
+
+def test_header_uses_leftover_budget():
+    # Nothing in this resume is a known heading, and it is over a quarter of the budget
+    resume = load_resume('unknown_headings.txt')
+    assert estimate_tokens(resume) > 1200 // 4
+    compacted, _ = compact_resume_text(resume, 1200)
+    assert compacted == resume.strip()
+    assert 'Python, SQL, Apache Spark, Kafka' in compacted
@@ -0,0 +1,92 @@
+import pytest
+from utils import ai_processor
+from utils.response_parser import extract_json, validate_match_result, validate_resume_data, _clean_percentage
+
+def test_extract_json_ignores_surrounding_text():
+    assert extract_json('Sure! Here is the result: {"name": "Jane"} Let me know.') == {'name': 'Jane'}
+
+def test_extract_json_strips_code_fences():
+    reply = '```json\n{"skills": ["Python", "SQL"], "summary": "Uses {braces}"}\n```'
+    assert extract_json(reply) == {'skills': ['Python', 'SQL'], 'summary': 'Uses {braces}'}
+
+def test_extract_json_returns_first_of_several_objects():
+    assert extract_json('{"a": 1}\n{"b": 2}') == {'a': 1}
+
+def test_extract_json_skips_invalid_braces():
+    assert extract_json('Result {not json} then {"match_percentage": 70}') == {'match_percentage': 70}
+
+@pytest.mark.parametrize('reply', [None, '', 'no json here', '[1, 2, 3]', '{"unterminated": '])
+def test_extract_json_without_an_object(reply):
+    assert extract_json(reply) is None
+
+@pytest.mark.parametrize('value, expected', [
+    (72, 72.0),
+    (72.5, 72.5),
+    ('85', 85.0),
+    (' 85% ', 85.0),
+    (-10, 0.0),
+    (150, 100.0),
+    ('250%', 100.0),
+    ('high', None),
+    (None, None),
+    (float('nan'), None),
+])
+def test_clean_percentage(value, expected):
+    assert _clean_percentage(value) == expected
+
+def test_skills_deduped_case_insensitively():
+    cleaned, invalid = validate_resume_data({'skills': ['Python', ' python ', 'SQL', '', 'sql', 42, 'Flask']})
+    assert cleaned['skills'] == ['Python', 'SQL', 'Flask']
+    assert 'skills' not in invalid
+
+def test_matched_skills_removed_from_missing():
+    cleaned, invalid = validate_match_result({
+        'match_percentage': '60%',
+        'matched_skills': ['Python', 'Docker'],
+        'missing_skills': ['docker', 'Kubernetes', 'PYTHON'],
+        'fit_summary': 'Partial match'
+    })
+    assert invalid == []
+    assert cleaned['match_percentage'] == 60.0
+    assert cleaned['missing_skills'] == ['Kubernetes']
+
+def test_invalid_fields_fall_back_to_defaults():
+    cleaned, invalid = validate_match_result({'match_percentage': 'n/a', 'matched_skills': 'Python'})
+    assert invalid == ['match_percentage', 'matched_skills', 'missing_skills', 'fit_summary']
+    assert cleaned == {'match_percentage': 0, 'matched_skills': [], 'missing_skills': [], 'fit_summary': ''}
+
+def test_generate_validated_reasks_only_for_invalid_fields(monkeypatch):
+    replies = [
+        {'match_percentage': 80, 'matched_skills': ['Python'], 'missing_skills': 'Docker', 'fit_summary': 'Good fit'},
+        {'missing_skills': ['Docker'], 'match_percentage': 5, 'fit_summary': 'Overwritten'},
+    ]
+    prompts = []
+    def fake_generate_json(prompt):
+        prompts.append(prompt)
+        return replies[len(prompts) - 1]
+    monkeypatch.setattr(ai_processor, '_generate_json', fake_generate_json)
+
+    cleaned, invalid = ai_processor._generate_validated('Score this match', validate_match_result)
+    assert invalid == []
+    assert len(prompts) == 2
+    assert 'Return a JSON object containing only these fields: missing_skills.' in prompts[1]
+    # Valid fields from the first answer are kept even if the re-ask repeats them
+    assert cleaned == {'match_percentage': 80.0, 'matched_skills': ['Python'], 'missing_skills': ['Docker'],
+                       'fit_summary': 'Good fit'}
+
+def test_generate_validated_skips_reask_when_valid(monkeypatch):
+    prompts = []
+    def fake_generate_json(prompt):
+        prompts.append(prompt)
+        return {'match_percentage': 40, 'matched_skills': [], 'missing_skills': ['Go'], 'fit_summary': 'Weak'}
+    monkeypatch.setattr(ai_processor, '_generate_json', fake_generate_json)
+
+    cleaned, invalid = ai_processor._generate_validated('Score this match', validate_match_result)
+    assert invalid == []
+    assert len(prompts) == 1
+    assert cleaned['missing_skills'] == ['Go']
+
+def test_generate_validated_reports_fields_still_invalid(monkeypatch):
+    monkeypatch.setattr(ai_processor, '_generate_json', lambda prompt: None)
+    cleaned, invalid = validate_resume_data({})
+    assert ai_processor._generate_validated('Extract this resume', validate_resume_data) == (cleaned, invalid)
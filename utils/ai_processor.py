@@ -1,11 +1,53 @@
 import google.generativeai as genai
 import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from models import db, User, Job, JobMatch
 from config import Config
+from utils.prompt_builder import compact_resume_text, serialize_candidate, serialize_job
+from utils.database import bulk_save_matches
+from utils.local_scorer import score_match, skill_overlap, LOCAL_MODEL_NAME
+from utils.resume_store import load_resume_text
+from utils.matcher import get_stale_users, get_stale_matches
+from utils.response_parser import extract_json, validate_resume_data, validate_match_result, RESUME_DEFAULTS, MATCH_DEFAULTS
+
+JSON_GENERATION_CONFIG = {'response_mime_type': 'application/json'}
+
+def configure_gemini():
+    """Configure the process-wide Gemini client (again in each forked worker)"""
+    if not Config.GEMINI_API_KEY:
+        return False
+    genai.configure(api_key=Config.GEMINI_API_KEY, transport=Config.GEMINI_TRANSPORT)
+    return True
+
+def _generate_json(prompt):
+    """Ask Gemini for a JSON-only reply and return the parsed object (or None)"""
+    model = genai.GenerativeModel(Config.GEMINI_MODEL, generation_config=JSON_GENERATION_CONFIG)
+    response = model.generate_content(prompt)
+    return extract_json(response.text)
+
+def _generate_validated(prompt, validator):
+    """Generate JSON and re-ask once for just the fields that failed validation"""
+    data = _generate_json(prompt) or {}
+    cleaned, invalid = validator(data)
+    if not invalid:
+        return cleaned, invalid
+    
+    reask_prompt = f"""{prompt}
+    
+    Your previous answer was missing or had invalid values for: {', '.join(invalid)}.
+    Return a JSON object containing only these fields: {', '.join(invalid)}.
+    """
+    fixes = _generate_json(reask_prompt) or {}
+    merged = dict(data)
+    merged.update({field: fixes[field] for field in invalid if field in fixes})
+    return validator(merged)
 
 def extract_resume_data(resume_text):
     """Extract structured data from resume text using Gemini"""
     
+    compacted_text, stats = compact_resume_text(resume_text, Config.RESUME_TOKEN_BUDGET)
+    print(f"Resume prompt tokens: {stats['tokens_before']} -> {stats['tokens_after']}")
+    
     prompt = f"""
     Extract the following information from this resume text and return as JSON:
     - name (string)
@@ -17,9 +59,9 @@ def extract_resume_data(resume_text):
     - summary (string)
     
     Resume Text:
-    {resume_text[:4000]}
+    {compacted_text}
     
-    Return only valid JSON. Format:
+    Return JSON in this format:
     {{
         "name": "John Doe",
         "email": "john@example.com",
@@ -45,47 +87,29 @@ def extract_resume_data(resume_text):
     """
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        
-        # Extract JSON from response
-        response_text = response.text.strip()
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0]
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0]
-        
-        data = json.loads(response_text)
+        data, invalid = _generate_validated(prompt, validate_resume_data)
+        if invalid:
+            print(f"Resume extraction left invalid fields: {invalid}")
         return data
     except Exception as e:
         print(f"Error parsing AI response: {e}")
-        return {
-            "name": "",
-            "email": "",
-            "phone": "",
-            "skills": [],
-            "experience": [],
-            "education": [],
-            "summary": ""
-        }
+        return dict(RESUME_DEFAULTS, skills=[], experience=[], education=[])
 
 def calculate_job_match(user_data, job_data):
     """Calculate match percentage between user and job"""
     
+    candidate_block = serialize_candidate(user_data, Config.CANDIDATE_TOKEN_BUDGET)
+    job_block = serialize_job(job_data, Config.JOB_TOKEN_BUDGET)
+    
     prompt = f"""
     Calculate the job match percentage between this candidate and job posting.
     Consider skills match, experience relevance, and overall fit.
     
     Candidate Profile:
-    Skills: {user_data.get('skills', [])}
-    Experience: {user_data.get('experience', [])}
-    Summary: {user_data.get('summary', '')}
+{candidate_block}
     
     Job Requirements:
-    Title: {job_data['title']}
-    Required Skills: {job_data['required_skills']}
-    Experience Required: {job_data['experience_required']}
-    Description: {job_data['description']}
+{job_block}
     
     Return a JSON with:
     - match_percentage (number between 0-100)
@@ -93,7 +117,7 @@ def calculate_job_match(user_data, job_data):
     - missing_skills (array of missing skills)
     - fit_summary (2-3 sentence explanation of the match)
     
-    Return only valid JSON. Format:
+    Return JSON in this format:
     {{
         "match_percentage": 85,
         "matched_skills": ["Python", "SQL"],
@@ -103,75 +127,161 @@ def calculate_job_match(user_data, job_data):
     """
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        
-        response_text = response.text.strip()
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0]
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0]
-        
-        match_data = json.loads(response_text)
+        match_data, invalid = _generate_validated(prompt, validate_match_result)
+        if 'match_percentage' in invalid:
+            raise ValueError(f"invalid fields in match response: {invalid}")
         return match_data
     except Exception as e:
         print(f"Error calculating job match: {e}")
-        return {
-            "match_percentage": 0, 
-            "matched_skills": [], 
-            "missing_skills": [], 
-            "fit_summary": "Error calculating match"
-        }
+        return dict(MATCH_DEFAULTS, matched_skills=[], missing_skills=[], fit_summary="Error calculating match", error=True)
 
 def calculate_all_matches(user_id):
     """Calculate matches for a user against all jobs using SQLAlchemy"""
+    calculate_matches(user_id)
+
+def _load_list(value):
+    """Parse a JSON list column, falling back to comma-separated profile text"""
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+        return parsed if isinstance(parsed, list) else []
+    except (json.JSONDecodeError, TypeError):
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+def build_user_data(user):
+    """Plain-dict candidate profile used by the match prompt"""
+    resume_text = load_resume_text(user)
+    return {
+        'skills': _load_list(user.skills),
+        'experience': _load_list(user.experience),
+        'summary': compact_resume_text(resume_text, Config.CANDIDATE_TOKEN_BUDGET)[0] if resume_text else '',
+        'preferred_location': user.preferred_location
+    }
+
+def build_job_data(job):
+    """Plain-dict job posting used by the match prompt"""
+    return {
+        'id': job.id,
+        'title': job.title,
+        'required_skills': _load_list(job.required_skills),
+        'experience_required': job.experience_required,
+        'location': job.location,
+        'description': job.description
+    }
+
+def score_job_match(user_data, job_data):
+    """Score a match with the local scorer, escalating only borderline cases to Gemini
+
+    Results carry a `route`: 'local' (clear case), 'llm', 'fallback' (Gemini
+    failed, local estimate kept) or 'offline' (no API key configured).
+    Fallback and offline results are stand-ins marked with `error`, so they
+    are saved as stale and rescored once Gemini is available.
+    """
+    local = score_match(user_data, job_data)
+    clear_case = local['confidence'] >= Config.ROUTER_MIN_CONFIDENCE and (
+        local['match_percentage'] <= Config.ROUTER_LOW_THRESHOLD
+        or local['match_percentage'] >= Config.ROUTER_HIGH_THRESHOLD
+    )
+    if clear_case:
+        return dict(local, route='local')
+    
+    if not Config.GEMINI_API_KEY:
+        route, result = 'offline', None
+    else:
+        result = calculate_job_match(user_data, job_data)
+        if not result.get('error'):
+            return dict(result, route='llm')
+        route = 'fallback'
+    
+    if local['confidence'] >= Config.ROUTER_FALLBACK_MIN_CONFIDENCE:
+        return dict(local, route=route, error=True)
+    # Too little data for the estimate to pass as a score
+    placeholder = result or dict(MATCH_DEFAULTS, matched_skills=[], missing_skills=[],
+                                 fit_summary="Not scored yet", model_name=LOCAL_MODEL_NAME)
+    return dict(placeholder, route=route, error=True)
+
+def routing_report(results):
+    """One-line summary of how a batch of matches was routed"""
+    counts = {}
+    for _, result in results:
+        counts[result.get('route', 'llm')] = counts.get(result.get('route', 'llm'), 0) + 1
+    routes = ', '.join(f"{route}={count}" for route, count in sorted(counts.items()))
+    return (f"Scoring routes: {routes or 'none'} (local below {Config.ROUTER_LOW_THRESHOLD}% "
+            f"or above {Config.ROUTER_HIGH_THRESHOLD}% at confidence >= {Config.ROUTER_MIN_CONFIDENCE})")
+
+def iter_job_matches(user_data, jobs_data, max_in_flight=None):
+    """Yield (job_id, match_result) as each job is scored (see score_job_match)
+
+    Jobs with the best skill overlap are submitted first, so strong matches
+    tend to arrive early. At most max_in_flight Gemini calls are outstanding
+    and a new one only starts when the consumer takes a result, so a slow
+    consumer throttles scoring instead of buffering results.
+    """
+    max_in_flight = max_in_flight or Config.SCORING_MAX_IN_FLIGHT
+    ordered = sorted(
+        jobs_data,
+        key=lambda job: skill_overlap(user_data.get('skills', []), job['required_skills']),
+        reverse=True
+    )
+    pending_jobs = iter(ordered)
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='scoring')
+    
+    def submit_next(in_flight):
+        job = next(pending_jobs, None)
+        if job is not None:
+            future = executor.submit(score_job_match, user_data, job)
+            in_flight[future] = job['id']
+    
+    in_flight = {}
+    try:
+        for _ in range(max_in_flight):
+            submit_next(in_flight)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                job_id = in_flight.pop(future)
+                yield job_id, future.result()
+                submit_next(in_flight)
+    finally:
+        # Stop early if the consumer went away (e.g. a closed stream)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def calculate_matches(user_id, job_ids=None):
+    """Calculate matches for a user against the given jobs (all jobs by default)"""
     
     # Get user data
     user = db.session.get(User, user_id)
     if not user:
         return
     
-    # Get all jobs
-    jobs = db.session.query(Job).all()
+    jobs_query = db.session.query(Job)
+    if job_ids is not None:
+        jobs_query = jobs_query.filter(Job.id.in_(job_ids))
+    jobs_data = [build_job_data(job) for job in jobs_query]
     
-    user_data = {
-        'skills': json.loads(user.skills) if user.skills else [],
-        'experience': json.loads(user.experience) if user.experience else [],
-        'summary': user.resume_text[:1000] if user.resume_text else ''
-    }
-    
-    for job in jobs:
-        job_data = {
-            'title': job.title,
-            'required_skills': json.loads(job.required_skills) if job.required_skills else [],
-            'experience_required': job.experience_required,
-            'description': job.description
-        }
-        
-        match_result = calculate_job_match(user_data, job_data)
-        
-        # Check if match already exists
-        existing_match = db.session.query(JobMatch).filter_by(
-            user_id=user_id, job_id=job.id
-        ).first()
-        
-        if existing_match:
-            # Update existing match
-            existing_match.match_percentage = match_result['match_percentage']
-            existing_match.matched_skills = json.dumps(match_result['matched_skills'])
-            existing_match.missing_skills = json.dumps(match_result['missing_skills'])
-            existing_match.fit_summary = match_result['fit_summary']
-        else:
-            # Create new match
-            new_match = JobMatch(
-                user_id=user_id,
-                job_id=job.id,
-                match_percentage=match_result['match_percentage'],
-                matched_skills=json.dumps(match_result['matched_skills']),
-                missing_skills=json.dumps(match_result['missing_skills']),
-                fit_summary=match_result['fit_summary']
-            )
-            db.session.add(new_match)
+    results = list(iter_job_matches(build_user_data(user), jobs_data))
+    print(routing_report(results))
     
-
+    bulk_save_matches(user_id, results)
     db.session.commit()
+
+def rescore_stale_matches(older_than=None, min_version=None, max_users=None):
+    """Rescore only stale JobMatch rows, most-viewed dashboards first
+
+    Defaults to rows produced by an older SCORER_VERSION. Returns the
+    number of users and matches rescored.
+    """
+    
+    if older_than is None and min_version is None:
+        min_version = Config.SCORER_VERSION
+    
+    users = 0
+    rescored = 0
+    for user_id, stale_count in get_stale_users(older_than, min_version, limit=max_users):
+        job_ids = [job_id for (job_id,) in get_stale_matches(older_than, min_version, user_id=user_id).with_entities(JobMatch.job_id)]
+        calculate_matches(user_id, job_ids)
+        users += 1
+        rescored += len(job_ids)
+    
+    return users, rescored
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from config import Config
+
+class HashingBusyError(Exception):
+    """Raised when the password hashing pool is saturated"""
+
+# bcrypt releases the GIL, so a small pool caps how many cores hashing can
+# take; the semaphore caps how many requests may wait on it
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(Config.HASH_WORKERS + Config.HASH_QUEUE_LIMIT)
+
+def _get_hash_executor():
+    """Create the hashing pool on first use, i.e. inside the worker process"""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            try:
+                from gevent import monkey
+                gevent_patched = monkey.is_module_patched('threading')
+            except ImportError:
+                gevent_patched = False
+            if gevent_patched:
+                # Patched threads are greenlets; bcrypt would stall the event loop
+                from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+                _hash_executor = NativeThreadPoolExecutor(max_workers=Config.HASH_WORKERS)
+            else:
+                _hash_executor = ThreadPoolExecutor(max_workers=Config.HASH_WORKERS, thread_name_prefix='bcrypt')
+        return _hash_executor
+
+def _run_hashing(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingBusyError("Password hashing queue is full")
+    try:
+        future = _get_hash_executor().submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hash_slots.release())
+    try:
+        return future.result(timeout=Config.HASH_TIMEOUT)
+    except FutureTimeoutError:
+        # The hash keeps its slot until it finishes, so the pool stays bounded
+        raise HashingBusyError("Password hashing timed out")
+
+def hash_password(password):
+    """Hash a password with the configured bcrypt cost"""
+    hashed = _run_hashing(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS))
+    return hashed.decode('utf-8')
+
+def check_password(password, password_hash):
+    """Check a password against a stored bcrypt hash"""
+    return _run_hashing(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def needs_rehash(password_hash):
+    """True when a stored hash was made with a different cost than configured"""
+    try:
+        return int(password_hash.split('$')[2]) != Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+class TokenBucketLimiter:
+    """In-process token bucket per key (IP address, email, ...)
+
+    Each bucket holds up to `capacity` tokens and refills at
+    `refill_per_second`. State is per worker process and capped at
+    `max_keys` buckets; past that the least recently used key is dropped,
+    which under a flood of new keys is the one that has had longest to refill.
+    """
+
+    def __init__(self, capacity, refill_per_second, max_keys=10000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+login_ip_limiter = TokenBucketLimiter(Config.LOGIN_IP_BURST, Config.LOGIN_IP_PER_MINUTE / 60.0)
+login_email_limiter = TokenBucketLimiter(Config.LOGIN_EMAIL_BURST, Config.LOGIN_EMAIL_PER_MINUTE / 60.0)
+
+def allow_login_attempt(ip_address, email):
+    """Check the per-IP and per-email buckets before any hashing is done"""
+    if not login_ip_limiter.allow(ip_address or 'unknown'):
+        return False
+    return login_email_limiter.allow((email or '').strip().lower())
@@ -0,0 +1,194 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from config import Config
+from models import db, JobMatch
+from utils.matcher import record_match_changes, rebuild_match_summary
+
+def worker_threads():
+    """Threads per gunicorn worker process (each process owns its own pool)"""
+    return max(1, int(os.getenv('GUNICORN_THREADS', 1)))
+
+def build_engine_options(database_uri):
+    """SQLAlchemy engine options sized for the gunicorn worker model"""
+    if database_uri.startswith('sqlite'):
+        return {
+            # Seconds a writer waits on a locked database before raising
+            'connect_args': {'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 15))}
+        }
+
+    threads = worker_threads()
+    return {
+        # One connection per request thread, plus headroom for bursts
+        'pool_size': int(os.getenv('DB_POOL_SIZE', threads)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', max(2, threads // 2))),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        # Recycle before Render's proxy drops idle connections instead of
+        # paying a SELECT 1 round trip on every checkout
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': False,
+        'pool_use_lifo': True,
+        # Batch executemany() UPDATEs as well as INSERTs
+        'executemany_mode': 'values_plus_batch',
+        'connect_args': {
+            'connect_timeout': 10,
+            # TCP keepalives detect dead connections without a query
+            'keepalives': 1,
+            'keepalives_idle': 30,
+            'keepalives_interval': 10,
+            'keepalives_count': 3
+        }
+    }
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Let concurrent dev workers read while one writes instead of locking"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT', 15)) * 1000}")
+    cursor.close()
+
+def add_missing_columns():
+    """Add nullable columns that were added to a model after its table was created
+
+    create_all() only creates missing tables, so this keeps existing
+    databases in step with models.py without a migration tool.
+    """
+    inspector = inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or column.primary_key or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} {column_type}"
+            ))
+            print(f"Added column {table.name}.{column.name}")
+    db.session.commit()
+
+def ensure_unique_job_matches():
+    """Give an existing job_match table its (user_id, job_id) unique constraint
+
+    Databases created before the constraint may hold duplicate rows from
+    overlapping scoring runs. The newest row per job is kept and the
+    affected users' summaries are rebuilt before the unique index is added.
+    """
+    inspector = inspect(db.engine)
+    if not inspector.has_table('job_match'):
+        return
+    unique = [constraint['column_names'] for constraint in inspector.get_unique_constraints('job_match')]
+    unique += [index['column_names'] for index in inspector.get_indexes('job_match') if index.get('unique')]
+    if any(set(columns) == {'user_id', 'job_id'} for columns in unique):
+        return
+
+    duplicated_users = [user_id for (user_id,) in db.session.query(JobMatch.user_id).group_by(
+        JobMatch.user_id, JobMatch.job_id
+    ).having(func.count(JobMatch.id) > 1).distinct()]
+    newest = select(func.max(JobMatch.id)).group_by(JobMatch.user_id, JobMatch.job_id)
+    removed = db.session.query(JobMatch).filter(JobMatch.id.not_in(newest)).delete(synchronize_session=False)
+    for user_id in duplicated_users:
+        rebuild_match_summary(user_id)
+
+    db.session.execute(text("CREATE UNIQUE INDEX uq_job_match_user_job ON job_match (user_id, job_id)"))
+    db.session.execute(text("DROP INDEX IF EXISTS ix_job_match_user_job"))
+    db.session.commit()
+    print(f"Added unique index on job_match (user_id, job_id), removed {removed} duplicate rows")
+
+# Batches up to this size look up existing rows by job id
+SMALL_BATCH = 500
+
+def _load_skills(value):
+    try:
+        return json.loads(value) if value else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+def _existing_matches(user_id, job_ids=None):
+    """{job_id: (id, (match_percentage, missing_skills))}, rows locked for update"""
+    query = db.session.query(
+        JobMatch.job_id, JobMatch.id, JobMatch.match_percentage, JobMatch.missing_skills
+    ).filter_by(user_id=user_id)
+    if job_ids is not None:
+        query = query.filter(JobMatch.job_id.in_(job_ids))
+    # Lock in job order so two writers for one user can't deadlock
+    query = query.order_by(JobMatch.job_id).with_for_update()
+    return {
+        job_id: (match_id, (percentage or 0, _load_skills(missing_skills)))
+        for job_id, match_id, percentage, missing_skills in query
+    }
+
+def _insert_new_matches(rows):
+    """INSERT ... ON CONFLICT DO NOTHING; returns the job ids actually inserted"""
+    dialect = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    table = JobMatch.__table__
+    statement = dialect.insert(table).on_conflict_do_nothing(
+        index_elements=['user_id', 'job_id']
+    ).returning(table.c.job_id)
+    return {job_id for (job_id,) in db.session.execute(statement, rows)}
+
+def bulk_save_matches(user_id, results):
+    """Upsert a user's JobMatch rows in two executemany batches
+
+    results is a list of (job_id, match_result) pairs. Existing rows are
+    looked up (and locked) with one query instead of one per job; a row
+    another writer inserted in the meantime hits the (user_id, job_id)
+    unique constraint and is updated instead. The user's UserMatchSummary
+    is updated in the same transaction.
+    """
+    job_ids = None
+    if len(results) <= SMALL_BATCH:
+        # Streamed writes arrive a few rows at a time; don't rescan every match
+        job_ids = [job_id for job_id, _ in results]
+    existing = _existing_matches(user_id, job_ids)
+
+    now = datetime.utcnow()
+    inserts = []
+    updates = []
+    for job_id, match_result in results:
+        row = {
+            'user_id': user_id,
+            'job_id': job_id,
+            'match_percentage': match_result['match_percentage'],
+            'matched_skills': json.dumps(match_result['matched_skills']),
+            'missing_skills': json.dumps(match_result['missing_skills']),
+            'fit_summary': match_result['fit_summary'],
+            # Failed scorings are recorded as version 0 so they stay stale
+            'scorer_version': 0 if match_result.get('error') else Config.SCORER_VERSION,
+            'model_name': match_result.get('model_name', Config.GEMINI_MODEL),
+            'updated_at': now
+        }
+        if job_id in existing:
+            row['id'] = existing[job_id][0]
+            updates.append(row)
+        else:
+            inserts.append(row)
+
+    inserted = _insert_new_matches(inserts) if inserts else set()
+    raced = [row for row in inserts if row['job_id'] not in inserted]
+    if raced:
+        # Inserted by a concurrent run since the lookup: update those rows instead
+        existing.update(_existing_matches(user_id, [row['job_id'] for row in raced]))
+        for row in raced:
+            row['id'] = existing[row['job_id']][0]
+            updates.append(row)
+    if updates:
+        db.session.bulk_update_mappings(JobMatch, updates)
+
+    changes = [
+        (job_id, None if job_id in inserted else existing[job_id][1],
+         (match_result['match_percentage'], match_result['missing_skills']))
+        for job_id, match_result in results
+    ]
+    if changes:
+        record_match_changes(user_id, changes)
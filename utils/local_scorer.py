@@ -0,0 +1,131 @@
+import re
+from datetime import date
+
+LOCAL_MODEL_NAME = 'local-scorer'
+
+# Component weights for the combined score
+SKILL_WEIGHT = 0.6
+EXPERIENCE_WEIGHT = 0.25
+LOCATION_WEIGHT = 0.15
+
+PRESENT_WORDS = ('present', 'current', 'now', 'today')
+REMOTE_WORDS = ('remote', 'anywhere', 'work from home', 'wfh')
+
+def normalize_skill(skill):
+    """Lowercase a skill and drop punctuation that doesn't change its meaning"""
+    return re.sub(r'[^a-z0-9+#]+', ' ', skill.lower()).strip()
+
+def _skill_set(skills):
+    return {normalize_skill(skill): skill for skill in skills if isinstance(skill, str) and normalize_skill(skill)}
+
+def skill_overlap(user_skills, job_skills):
+    """Fraction of the job's required skills the candidate lists (0-1)"""
+    required = _skill_set(job_skills)
+    if not required:
+        return 0.0
+    return len(required.keys() & _skill_set(user_skills).keys()) / len(required)
+
+def parse_required_years(text):
+    """Parse '2-4 years', '5+ years' or '3 years' into (min, max); max may be None"""
+    if not text:
+        return None
+    numbers = [float(n) for n in re.findall(r'\d+(?:\.\d+)?', text)]
+    if not numbers:
+        return (0.0, 1.0) if re.search(r'entry|junior|graduate|intern', text, re.IGNORECASE) else None
+    if '+' in text or re.search(r'at least|minimum|or more', text, re.IGNORECASE):
+        return numbers[0], None
+    if len(numbers) >= 2:
+        return min(numbers[:2]), max(numbers[:2])
+    return numbers[0], numbers[0]
+
+def _duration_years(duration):
+    if not isinstance(duration, str) or not duration.strip():
+        return None
+    text = duration.lower()
+
+    explicit = re.findall(r'(\d+(?:\.\d+)?)\s*(year|yr|month|mo)', text)
+    if explicit:
+        return sum(float(n) / (12 if unit.startswith('mo') else 1) for n, unit in explicit)
+
+    years = [int(y) for y in re.findall(r'(?:19|20)\d{2}', text)]
+    if years and any(word in text for word in PRESENT_WORDS):
+        years.append(date.today().year)
+    if len(years) >= 2:
+        return max(0, max(years) - min(years))
+    return None
+
+def candidate_years(experience):
+    """Total years of experience from the roles' duration strings, or None"""
+    total = None
+    for role in experience or []:
+        years = _duration_years(role.get('duration')) if isinstance(role, dict) else None
+        if years is not None:
+            total = (total or 0) + years
+    return total
+
+def location_matches(preferred_location, job_location):
+    """True/False when both locations are known, None otherwise"""
+    if not job_location:
+        return None
+    job_location = job_location.lower()
+    if any(word in job_location for word in REMOTE_WORDS):
+        return True
+    if not preferred_location:
+        return None
+    preferred = preferred_location.lower()
+    if any(word in preferred for word in REMOTE_WORDS):
+        return False
+    # Compare city / region tokens ("New York, NY" vs "new york")
+    preferred_parts = {part.strip() for part in preferred.split(',') if part.strip()}
+    job_parts = {part.strip() for part in job_location.split(',') if part.strip()}
+    return bool(preferred_parts & job_parts)
+
+def score_match(user_data, job_data):
+    """Deterministic match score with a confidence value
+
+    Returns the same fields as the Gemini scorer plus `confidence`, the
+    weighted share of score components that had data on both sides.
+    """
+    user_skills = _skill_set(user_data.get('skills', []))
+    job_skills = _skill_set(job_data.get('required_skills') or [])
+    matched = [skill for key, skill in job_skills.items() if key in user_skills]
+    missing = [skill for key, skill in job_skills.items() if key not in user_skills]
+
+    components = []
+    if job_skills:
+        # A candidate listing none of the skills scores 0 here, not "unknown"
+        components.append((SKILL_WEIGHT, len(matched) / len(job_skills)))
+
+    required = parse_required_years(job_data.get('experience_required'))
+    years = candidate_years(user_data.get('experience'))
+    if required is not None and years is not None:
+        low, high = required
+        if years >= low:
+            # Far over the top of the range is a weaker fit, not a mismatch
+            experience_score = 1.0 if high is None or years <= high + 3 else 0.8
+        else:
+            experience_score = years / low if low else 1.0
+        components.append((EXPERIENCE_WEIGHT, experience_score))
+
+    location = location_matches(user_data.get('preferred_location'), job_data.get('location'))
+    if location is not None:
+        components.append((LOCATION_WEIGHT, 1.0 if location else 0.0))
+
+    covered = sum(weight for weight, _ in components)
+    score = sum(weight * value for weight, value in components) / covered * 100 if covered else 0
+    confidence = covered / (SKILL_WEIGHT + EXPERIENCE_WEIGHT + LOCATION_WEIGHT)
+
+    parts = [f"{len(matched)} of {len(job_skills)} required skills"]
+    if years is not None and required is not None:
+        parts.append(f"about {years:.0f} years of experience against {job_data.get('experience_required')}")
+    if location is not None:
+        parts.append('location fits' if location else 'location does not fit')
+
+    return {
+        'match_percentage': round(score, 1),
+        'matched_skills': matched,
+        'missing_skills': missing,
+        'fit_summary': f"Estimated from {', '.join(parts)}.",
+        'confidence': round(confidence, 2),
+        'model_name': LOCAL_MODEL_NAME
+    }
@@ -1,17 +1,153 @@
 import json
-from models import db, User, Job, JobMatch
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, or_
+from config import Config
+from models import db, User, Job, JobMatch, UserMatchSummary
 
-def get_user_matches(user_id, limit=10):
-    """Get job matches for a specific user using SQLAlchemy"""
+# Number of best matches kept in UserMatchSummary.top_matches
+SUMMARY_TOP_N = 10
+# Matches at or above this percentage don't count towards missing skills
+MISSING_SKILLS_THRESHOLD = 80
+TOP_MISSING_SKILLS = 5
+
+def _load_json(value, default):
+    try:
+        return json.loads(value) if value else default
+    except (json.JSONDecodeError, TypeError):
+        return default
+
+def _count_missing_skills(skill_counts, missing_skills, delta):
+    for skill in missing_skills:
+        if not isinstance(skill, str):
+            continue
+        count = skill_counts.get(skill, 0) + delta
+        if count > 0:
+            skill_counts[skill] = count
+        else:
+            skill_counts.pop(skill, None)
+
+def _query_top_matches(user_id):
+    rows = db.session.query(JobMatch.job_id, JobMatch.match_percentage).filter_by(
+        user_id=user_id
+    ).order_by(JobMatch.match_percentage.desc()).limit(SUMMARY_TOP_N).all()
+    return [[job_id, percentage or 0] for job_id, percentage in rows]
+
+def _finish_summary(summary, top_matches, skill_counts):
+    summary.average_match = round(summary.match_sum / summary.total_matches, 1) if summary.total_matches else 0
+    summary.best_match = round(top_matches[0][1], 1) if top_matches else 0
+    summary.top_matches = json.dumps(top_matches)
+    summary.missing_skill_counts = json.dumps(skill_counts)
+    sorted_skills = sorted(skill_counts.items(), key=lambda x: x[1], reverse=True)[:TOP_MISSING_SKILLS]
+    summary.top_missing_skills = json.dumps([skill for skill, count in sorted_skills])
+
+def _lock_summary(user_id):
+    """Load a user's summary row locked until the transaction ends
+
+    Writers for the same user then apply their changes one after another
+    instead of overwriting each other's counts. PostgreSQL takes a row
+    lock (SELECT ... FOR UPDATE); SQLite has no row locks but already
+    holds the database write lock once the JobMatch rows are written.
+    """
+    return db.session.query(UserMatchSummary).filter_by(
+        user_id=user_id
+    ).with_for_update().populate_existing().first()
+
+def rebuild_match_summary(user_id):
+    """Recompute a user's UserMatchSummary from their JobMatch rows"""
+    
+    summary = _lock_summary(user_id)
+    if summary is None:
+        summary = UserMatchSummary(user_id=user_id)
+        db.session.add(summary)
+    
+    summary.total_matches = 0
+    summary.match_sum = 0
+    skill_counts = {}
+    for percentage, missing_skills in db.session.query(
+        JobMatch.match_percentage, JobMatch.missing_skills
+    ).filter_by(user_id=user_id):
+        summary.total_matches += 1
+        summary.match_sum += percentage or 0
+        if (percentage or 0) < MISSING_SKILLS_THRESHOLD:
+            _count_missing_skills(skill_counts, _load_json(missing_skills, []), 1)
+    
+    _finish_summary(summary, _query_top_matches(user_id), skill_counts)
+    return summary
+
+def record_match_changes(user_id, changes):
+    """Fold freshly written JobMatch rows into the user's summary
+
+    Call after the rows are written, in the same transaction. changes is a
+    list of (job_id, old, new) where old/new are (match_percentage,
+    missing_skills) tuples and old is None for inserted rows.
+    """
+    
+    summary = _lock_summary(user_id)
+    if summary is None:
+        # First write for this user (or a pre-summary account): the rows
+        # are already flushed, so a full rebuild sees the new values
+        return rebuild_match_summary(user_id)
+    
+    top = dict((job_id, percentage) for job_id, percentage in _load_json(summary.top_matches, []))
+    top_was_full = len(top) >= SUMMARY_TOP_N
+    skill_counts = _load_json(summary.missing_skill_counts, {})
+    top_dropped = False
+    
+    for job_id, old, new in changes:
+        new_percentage, new_missing = new
+        if old is None:
+            summary.total_matches += 1
+            summary.match_sum += new_percentage
+        else:
+            old_percentage, old_missing = old
+            summary.match_sum += new_percentage - old_percentage
+            if old_percentage < MISSING_SKILLS_THRESHOLD:
+                _count_missing_skills(skill_counts, old_missing, -1)
+            if job_id in top and new_percentage < top[job_id]:
+                top_dropped = True
+        if new_percentage < MISSING_SKILLS_THRESHOLD:
+            _count_missing_skills(skill_counts, new_missing, 1)
+        top[job_id] = new_percentage
     
-    matches = db.session.query(JobMatch).filter_by(user_id=user_id).order_by(
-        JobMatch.match_percentage.desc()
-    ).limit(limit).all()
+    if top_dropped and top_was_full:
+        # A former top match fell and an unseen row may now outrank it
+        top_matches = _query_top_matches(user_id)
+    else:
+        top_matches = sorted(([job_id, p] for job_id, p in top.items()), key=lambda x: x[1], reverse=True)[:SUMMARY_TOP_N]
+    
+    _finish_summary(summary, top_matches, skill_counts)
+    return summary
+
+def get_match_summary(user_id):
+    """Return the user's UserMatchSummary, building it on first access"""
+    
+    summary = db.session.get(UserMatchSummary, user_id)
+    if summary is None:
+        summary = rebuild_match_summary(user_id)
+        db.session.commit()
+    return summary
+
+def get_user_matches(user_id, limit=SUMMARY_TOP_N):
+    """Get a user's best job matches from their precomputed summary"""
+    
+    summary = get_match_summary(user_id)
+    job_ids = [job_id for job_id, percentage in _load_json(summary.top_matches, [])[:limit]]
+    if not job_ids:
+        return []
+    
+    jobs = {job.id: job for job in db.session.query(Job).filter(Job.id.in_(job_ids))}
+    matches = {match.job_id: match for match in db.session.query(JobMatch).filter(
+        JobMatch.user_id == user_id, JobMatch.job_id.in_(job_ids)
+    )}
     
     matches_list = []
-    for match in matches:
-        job = db.session.get(Job, match.job_id)
-        if job:
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        match = matches.get(job_id)
+        if job and match:
             matches_list.append({
                 'id': job.id,
                 'title': job.title,
@@ -20,51 +156,169 @@ def get_user_matches(user_id, limit=10):
                 'location': job.location,
                 'salary_range': job.salary_range,
                 'match_percentage': match.match_percentage or 0,
-                'matched_skills': json.loads(match.matched_skills) if match.matched_skills else [],
-                'missing_skills': json.loads(match.missing_skills) if match.missing_skills else [],
+                'matched_skills': _load_json(match.matched_skills, []),
+                'missing_skills': _load_json(match.missing_skills, []),
                 'fit_summary': match.fit_summary or "No summary available"
             })
     
     return matches_list
 
 def get_user_match_stats(user_id):
-    """Get matching statistics for a user using SQLAlchemy"""
-    
-    from sqlalchemy import func
-    
-    stats = db.session.query(
-        func.count(JobMatch.id),
-        func.avg(JobMatch.match_percentage),
-        func.max(JobMatch.match_percentage)
-    ).filter_by(user_id=user_id).first()
+    """Get matching statistics for a user from their precomputed summary"""
     
+    summary = get_match_summary(user_id)
     return {
-        'total_matches': stats[0] if stats[0] else 0,
-        'average_match': round(stats[1], 1) if stats[1] else 0,
-        'best_match': round(stats[2], 1) if stats[2] else 0
+        'total_matches': summary.total_matches or 0,
+        'average_match': summary.average_match or 0,
+        'best_match': summary.best_match or 0
     }
 
 def get_missing_skills_analysis(user_id):
-    """Analyze most common missing skills across job matches using SQLAlchemy"""
+    """Most common missing skills across the user's weaker matches"""
     
-    matches = db.session.query(JobMatch).filter_by(
-        user_id=user_id
-    ).filter(JobMatch.match_percentage < 80).all()
-    
-    # Count frequency of missing skills
-    skill_count = {}
-    for match in matches:
-        if match.missing_skills:
-            try:
-                skills = json.loads(match.missing_skills)
-                for skill in skills:
-                    skill_count[skill] = skill_count.get(skill, 0) + 1
-            except (json.JSONDecodeError, TypeError):
-                continue
-    
-    # Return top 5 most frequently missing skills
-    sorted_skills = sorted(skill_count.items(), key=lambda x: x[1], reverse=True)[:5]
-    return [skill for skill, count in sorted_skills]
+    return _load_json(get_match_summary(user_id).top_missing_skills, [])
+
+# Views counted in this worker since the last flush, {user_id: views}
+_pending_views = Counter()
+_pending_views_lock = threading.Lock()
+_views_flushed_at = time.monotonic()
+
+def record_dashboard_view(user_id):
+    """Count a dashboard view; rescoring serves frequent viewers first
+
+    Views are only a ranking hint, so they are buffered in memory and
+    written in one batch every DASHBOARD_VIEW_FLUSH_SECONDS rather than
+    committed on every page load.
+    """
+    global _views_flushed_at
+    
+    with _pending_views_lock:
+        _pending_views[user_id] += 1
+        if time.monotonic() - _views_flushed_at < Config.DASHBOARD_VIEW_FLUSH_SECONDS:
+            return
+        _views_flushed_at = time.monotonic()
+    flush_dashboard_views()
+
+def flush_dashboard_views():
+    """Write the buffered view counts with one batched UPDATE"""
+    
+    with _pending_views_lock:
+        pending = dict(_pending_views)
+        _pending_views.clear()
+    if not pending:
+        return
+    
+    summary = UserMatchSummary.__table__
+    try:
+        db.session.execute(
+            summary.update()
+            .where(summary.c.user_id == bindparam('summary_user_id'))
+            .values(dashboard_views=func.coalesce(summary.c.dashboard_views, 0) + bindparam('views')),
+            [{'summary_user_id': user_id, 'views': views} for user_id, views in pending.items()]
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Dashboard view flush error: {e}")
+        with _pending_views_lock:
+            _pending_views.update(pending)
+
+# scorer_version of matches flagged by mark_matches_stale, below the 0 stored
+# for offline/fallback estimates so needs_scoring can tell them apart
+RESCORE_VERSION = -1
+
+def _stale_condition(older_than=None, min_version=None):
+    conditions = []
+    if older_than is not None:
+        conditions.append(func.coalesce(JobMatch.updated_at, JobMatch.created_at) < older_than)
+    if min_version is not None:
+        # Rows from before versioning have no version and count as 0
+        conditions.append(func.coalesce(JobMatch.scorer_version, 0) < min_version)
+    if not conditions:
+        raise ValueError("Pass older_than and/or min_version")
+    return or_(*conditions)
+
+def get_stale_matches(older_than=None, min_version=None, user_id=None):
+    """Query JobMatch rows scored before older_than or by a version below min_version"""
+    
+    query = db.session.query(JobMatch).filter(_stale_condition(older_than, min_version))
+    if user_id is not None:
+        query = query.filter(JobMatch.user_id == user_id)
+    return query
+
+def get_current_matches(user_id):
+    """A user's JobMatch rows already scored by the current SCORER_VERSION"""
+    
+    return db.session.query(JobMatch).filter(
+        JobMatch.user_id == user_id,
+        ~_stale_condition(min_version=Config.SCORER_VERSION)
+    )
+
+def mark_matches_stale(user_id):
+    """Flag all of a user's matches for rescoring, e.g. after a new resume"""
+    
+    return db.session.query(JobMatch).filter_by(user_id=user_id).update(
+        {JobMatch.scorer_version: RESCORE_VERSION}, synchronize_session=False
+    )
+
+def needs_scoring(user_id):
+    """True if the user has jobs without a match or matches waiting for a rescore
+
+    Estimates stored while Gemini was unavailable (version 0) only count
+    when an API key is configured; otherwise every dashboard view would
+    re-estimate them to the same result.
+    """
+    
+    unmatched = db.session.query(Job.id).filter(
+        ~db.session.query(JobMatch.id).filter(JobMatch.user_id == user_id, JobMatch.job_id == Job.id).exists()
+    )
+    if unmatched.first() is not None:
+        return True
+    
+    min_version = Config.SCORER_VERSION if Config.GEMINI_API_KEY else 0
+    return get_stale_matches(min_version=min_version, user_id=user_id).with_entities(JobMatch.id).first() is not None
+
+def claim_scoring_run(user_id):
+    """Start a scoring run for the user unless one is already going
+
+    A conditional UPDATE on the summary row, so only one request across
+    all worker processes wins. Returns the claim token (pass it to
+    release_scoring_run) or None. Claims older than SCORING_LEASE_SECONDS
+    are assumed dead and taken over.
+    """
+    
+    get_match_summary(user_id)
+    now = datetime.utcnow()
+    claimed = db.session.query(UserMatchSummary).filter(
+        UserMatchSummary.user_id == user_id,
+        or_(
+            UserMatchSummary.scoring_started_at.is_(None),
+            UserMatchSummary.scoring_started_at < now - timedelta(seconds=Config.SCORING_LEASE_SECONDS)
+        )
+    ).update({UserMatchSummary.scoring_started_at: now}, synchronize_session=False)
+    db.session.commit()
+    return now if claimed else None
+
+def release_scoring_run(user_id, token):
+    """End a scoring run started by claim_scoring_run (if it still owns the claim)"""
+    
+    db.session.query(UserMatchSummary).filter_by(user_id=user_id, scoring_started_at=token).update(
+        {UserMatchSummary.scoring_started_at: None}, synchronize_session=False
+    )
+    db.session.commit()
+
+def get_stale_users(older_than=None, min_version=None, limit=None):
+    """(user_id, stale_count) pairs, users who view their dashboard most first"""
+    
+    views = func.coalesce(UserMatchSummary.dashboard_views, 0)
+    query = db.session.query(JobMatch.user_id, func.count(JobMatch.id)).outerjoin(
+        UserMatchSummary, UserMatchSummary.user_id == JobMatch.user_id
+    ).filter(
+        _stale_condition(older_than, min_version)
+    ).group_by(JobMatch.user_id, views).order_by(views.desc(), func.count(JobMatch.id).desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
 
 def update_all_user_matches():
     """Recalculate matches for all users (admin function) using SQLAlchemy"""
@@ -0,0 +1,212 @@
+import math
+import re
+
+# Rough Gemini tokenizer ratio for English resume text
+CHARS_PER_TOKEN = 4
+
+# parse_pdf separates pages with form feeds
+PAGE_BREAK = '\f'
+
+# Lines at the top/bottom of a page that are checked for repeated headers/footers
+PAGE_EDGE_LINES = 2
+
+SECTION_HEADINGS = {
+    'skills': ('skills', 'technical skills', 'core competencies', 'technologies', 'tech stack', 'tools'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment', 'employment history', 'work history'),
+    'summary': ('summary', 'professional summary', 'profile', 'objective', 'about me'),
+    'education': ('education', 'academic background', 'qualifications'),
+    'projects': ('projects', 'personal projects', 'key projects'),
+    'certifications': ('certifications', 'certificates', 'licenses'),
+}
+
+# Sections in the order they are allowed to claim the token budget
+SECTION_PRIORITY = ['header', 'skills', 'experience', 'summary', 'education', 'projects', 'certifications']
+
+# Contact details go first but may not crowd skills out of a tight budget
+HEADER_BUDGET_SHARE = 0.25
+
+BOILERPLATE_PATTERNS = [
+    re.compile(r'^page \d+( of \d+)?$', re.IGNORECASE),
+    re.compile(r'^references (are )?available (up)?on request\.?$', re.IGNORECASE),
+    re.compile(r'^curriculum vitae$|^resume$', re.IGNORECASE),
+    re.compile(r'^[\W_]+$'),
+]
+
+def estimate_tokens(text):
+    """Estimate the number of tokens Gemini will count for a piece of text"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def normalize_whitespace(text):
+    """Collapse runs of spaces and blank lines left behind by PDF/DOCX extraction"""
+    if not text:
+        return ''
+
+    lines = [re.sub(r'[ \t ]+', ' ', line).strip() for line in text.splitlines()]
+
+    normalized = []
+    for line in lines:
+        if not line and (not normalized or not normalized[-1]):
+            continue
+        normalized.append(line)
+
+    return '\n'.join(normalized).strip()
+
+def _page_edges(page):
+    """Indexes of the first and last few non-blank lines of a page"""
+    content = [index for index, line in enumerate(page) if line]
+    return set(content[:PAGE_EDGE_LINES] + content[-PAGE_EDGE_LINES:])
+
+def dedupe_boilerplate(pages):
+    """Drop page footers, decorative rules and headers/footers repeated across pages
+
+    `pages` is a list of line lists. A line counts as a running header or
+    footer when it sits at the edge of at least two pages; only its first
+    occurrence is kept. Lines repeated inside the body (the same job title
+    at two companies) are content and stay.
+    """
+    edge_counts = {}
+    for page in pages:
+        for key in {page[index].lower() for index in _page_edges(page)}:
+            edge_counts[key] = edge_counts.get(key, 0) + 1
+
+    seen_edges = set()
+    kept = []
+    for page in pages:
+        edges = _page_edges(page)
+        for index, line in enumerate(page):
+            if any(pattern.match(line) for pattern in BOILERPLATE_PATTERNS):
+                continue
+            key = line.lower()
+            if index in edges and edge_counts.get(key, 0) >= 2:
+                if key in seen_edges:
+                    continue
+                seen_edges.add(key)
+            kept.append(line)
+    return kept
+
+def _heading_for(line):
+    """Return the section name if the line looks like a resume heading"""
+    candidate = line.strip().rstrip(':').lower()
+    if not candidate or len(candidate) > 40:
+        return None
+    for section, headings in SECTION_HEADINGS.items():
+        if candidate in headings:
+            return section
+    return None
+
+def split_sections(text):
+    """Split resume text into ordered (section, lines) blocks"""
+    blocks = [['header', []]]
+    for line in text.splitlines():
+        section = _heading_for(line)
+        if section:
+            blocks.append([section, [line]])
+        else:
+            blocks[-1][1].append(line)
+    return [(section, lines) for section, lines in blocks if any(lines)]
+
+def _line_groups(section, lines):
+    """Split a block into lines kept or dropped together
+
+    A heading is only kept along with the first line of content under it.
+    """
+    if section == 'header':
+        return [[line] for line in lines]
+    first = next((index for index, line in enumerate(lines[1:], 1) if line), len(lines) - 1)
+    return [lines[:first + 1]] + [[line] for line in lines[first + 1:]]
+
+def compact_resume_text(resume_text, token_budget):
+    """Shrink resume text to fit the token budget, keeping skills and recent roles first
+
+    Returns the compacted text and a dict with token counts before and after.
+    """
+    tokens_before = estimate_tokens(resume_text)
+
+    pages = [normalize_whitespace(page).splitlines() for page in (resume_text or '').split(PAGE_BREAK)]
+    text = normalize_whitespace('\n'.join(dedupe_boilerplate(pages)))
+    blocks = split_sections(text)
+
+    # Give each section its lines in priority order until the budget runs out.
+    # Resumes are reverse chronological, so keeping the leading lines of the
+    # experience block keeps the most recent roles. The header is capped on
+    # the first pass so it can't crowd out skills; a second pass hands any
+    # budget left over to the header and to sections that were cut short.
+    groups = [_line_groups(section, lines) for section, lines in blocks]
+    kept_groups = [0 for _ in blocks]
+    remaining = token_budget
+    for capped in (True, False):
+        for section in SECTION_PRIORITY:
+            for index, (block_section, _) in enumerate(blocks):
+                if block_section != section:
+                    continue
+                allowance = remaining
+                if capped and section == 'header':
+                    allowance = min(remaining, int(token_budget * HEADER_BUDGET_SHARE))
+                for group in groups[index][kept_groups[index]:]:
+                    cost = sum(estimate_tokens(line + '\n') for line in group)
+                    if cost > allowance:
+                        break
+                    kept_groups[index] += 1
+                    allowance -= cost
+                    remaining -= cost
+
+    kept_lines = [line for block, count in zip(groups, kept_groups) for group in block[:count] for line in group]
+    compacted = '\n'.join(kept_lines).strip()
+    stats = {
+        'tokens_before': tokens_before,
+        'tokens_after': estimate_tokens(compacted)
+    }
+    return compacted, stats
+
+def _truncate_to_budget(text, token_budget):
+    """Cut text at a word boundary so it fits the token budget"""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(' ', 1)[0]
+
+def serialize_candidate(user_data, token_budget, max_roles=3):
+    """Build a compact candidate profile block for the match prompt"""
+    skills = []
+    for skill in user_data.get('skills', []) or []:
+        if isinstance(skill, str) and skill.strip() and skill.strip().lower() not in [s.lower() for s in skills]:
+            skills.append(skill.strip())
+
+    roles = []
+    for role in (user_data.get('experience', []) or [])[:max_roles]:
+        if isinstance(role, dict):
+            title = ' @ '.join(part for part in (role.get('role'), role.get('company')) if part)
+            if role.get('duration'):
+                title += f" ({role['duration']})"
+            roles.append(title)
+        elif isinstance(role, str) and role.strip():
+            roles.append(role.strip())
+
+    lines = [f"Skills: {', '.join(skills)}"]
+    if roles:
+        lines.append(f"Recent roles: {'; '.join(roles)}")
+
+    used = estimate_tokens('\n'.join(lines))
+    summary = normalize_whitespace(user_data.get('summary', '')).replace('\n', ' ')
+    if summary and used < token_budget:
+        lines.append(f"Summary: {_truncate_to_budget(summary, token_budget - used)}")
+
+    return '\n'.join(lines)
+
+def serialize_job(job_data, token_budget):
+    """Build a compact job requirements block for the match prompt"""
+    skills = job_data.get('required_skills') or []
+    lines = [
+        f"Title: {job_data.get('title', '')}",
+        f"Required Skills: {', '.join(skills) if isinstance(skills, list) else skills}",
+        f"Experience Required: {job_data.get('experience_required') or 'Not specified'}"
+    ]
+
+    used = estimate_tokens('\n'.join(lines))
+    description = normalize_whitespace(job_data.get('description') or '').replace('\n', ' ')
+    if description and used < token_budget:
+        lines.append(f"Description: {_truncate_to_budget(description, token_budget - used)}")
+
+    return '\n'.join(lines)
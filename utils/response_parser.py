@@ -0,0 +1,132 @@
+import json
+
+_decoder = json.JSONDecoder()
+
+RESUME_DEFAULTS = {
+    "name": "",
+    "email": "",
+    "phone": "",
+    "skills": [],
+    "experience": [],
+    "education": [],
+    "summary": ""
+}
+
+MATCH_DEFAULTS = {
+    "match_percentage": 0,
+    "matched_skills": [],
+    "missing_skills": [],
+    "fit_summary": ""
+}
+
+def extract_json(response_text):
+    """Return the first JSON object found in a model reply, or None
+
+    Scans once for each opening brace and lets the decoder consume the
+    object in place, so code fences or chatter around the JSON are ignored.
+    """
+    if not response_text:
+        return None
+
+    start = response_text.find('{')
+    while start != -1:
+        try:
+            value, _ = _decoder.raw_decode(response_text, start)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+        start = response_text.find('{', start + 1)
+    return None
+
+def _clean_string(value):
+    if value is None:
+        return ''
+    if isinstance(value, (str, int, float)):
+        return str(value).strip()
+    return None
+
+def _clean_skills(value):
+    """Normalize a skills array, dropping blanks and case-insensitive duplicates"""
+    if not isinstance(value, list):
+        return None
+    skills = []
+    seen = set()
+    for skill in value:
+        if not isinstance(skill, str) or not skill.strip():
+            continue
+        key = skill.strip().lower()
+        if key not in seen:
+            seen.add(key)
+            skills.append(skill.strip())
+    return skills
+
+def _clean_objects(value, fields):
+    if not isinstance(value, list):
+        return None
+    return [
+        {field: _clean_string(item.get(field)) or '' for field in fields}
+        for item in value if isinstance(item, dict)
+    ]
+
+def _clean_percentage(value):
+    if isinstance(value, str):
+        value = value.strip().rstrip('%')
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value != value:  # NaN
+        return None
+    return max(0.0, min(100.0, value))
+
+def validate_resume_data(data):
+    """Validate extracted resume data
+
+    Returns the cleaned data (invalid fields replaced by defaults) and the
+    list of field names that were missing or invalid.
+    """
+    data = data if isinstance(data, dict) else {}
+    cleaners = {
+        'name': _clean_string,
+        'email': _clean_string,
+        'phone': _clean_string,
+        'skills': _clean_skills,
+        'experience': lambda v: _clean_objects(v, ('role', 'company', 'duration', 'description')),
+        'education': lambda v: _clean_objects(v, ('degree', 'institution', 'year')),
+        'summary': _clean_string,
+    }
+    return _apply_cleaners(data, cleaners, RESUME_DEFAULTS)
+
+def validate_match_result(data):
+    """Validate a job match result
+
+    Returns the cleaned result and the list of field names that were
+    missing or invalid. match_percentage is clamped to 0-100 and the skill
+    lists are deduped.
+    """
+    data = data if isinstance(data, dict) else {}
+    cleaners = {
+        'match_percentage': _clean_percentage,
+        'matched_skills': _clean_skills,
+        'missing_skills': _clean_skills,
+        'fit_summary': _clean_string,
+    }
+    cleaned, invalid = _apply_cleaners(data, cleaners, MATCH_DEFAULTS)
+
+    # A skill cannot be both matched and missing
+    matched = {skill.lower() for skill in cleaned['matched_skills']}
+    cleaned['missing_skills'] = [s for s in cleaned['missing_skills'] if s.lower() not in matched]
+    return cleaned, invalid
+
+def _apply_cleaners(data, cleaners, defaults):
+    cleaned = {}
+    invalid = []
+    for field, cleaner in cleaners.items():
+        value = cleaner(data.get(field)) if field in data else None
+        if value is None:
+            invalid.append(field)
+            value = defaults[field]
+            value = list(value) if isinstance(value, list) else value
+        cleaned[field] = value
+    return cleaned, invalid
@@ -1,6 +1,7 @@
 import PyPDF2
 from docx import Document
 from config import Config
+from utils.prompt_builder import PAGE_BREAK
 
 def allowed_file(filename):
     return '.' in filename and \
@@ -22,12 +23,13 @@ def parse_pdf(file):
     """Extract text from PDF file"""
     try:
         pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
+        pages = []
         
         for page in pdf_reader.pages:
-            text += page.extract_text()
+            pages.append(page.extract_text() or "")
         
-        return text
+        # Keep page boundaries so running headers/footers can be recognised
+        return PAGE_BREAK.join(pages)
     except Exception as e:
         raise Exception(f"Error reading PDF: {str(e)}")
 
@@ -0,0 +1,29 @@
+import zlib
+from models import db, User, ResumeBlob
+
+COMPRESSION_LEVEL = 6
+
+def save_resume_text(user_id, resume_text):
+    """Store a user's resume text compressed, outside the hot User row"""
+    data = (resume_text or '').encode('utf-8')
+    blob = db.session.get(ResumeBlob, user_id)
+    if blob is None:
+        blob = ResumeBlob(user_id=user_id)
+        db.session.add(blob)
+    blob.compressed_text = zlib.compress(data, COMPRESSION_LEVEL)
+    blob.original_size = len(data)
+    return blob
+
+def load_resume_text(user):
+    """Return a user's resume text, from ResumeBlob or the legacy column"""
+    blob = db.session.get(ResumeBlob, user.id)
+    if blob is not None and blob.compressed_text is not None:
+        return zlib.decompress(blob.compressed_text).decode('utf-8')
+    # Loads the deferred column only for accounts not yet compacted
+    return user.resume_text or ''
+
+def has_resume(user_id):
+    """True if the user has uploaded a resume, without loading its text"""
+    if db.session.query(ResumeBlob.user_id).filter_by(user_id=user_id).first():
+        return True
+    return db.session.query(User.id).filter(User.id == user_id, User.resume_text.isnot(None), User.resume_text != '').first() is not None
@@ -0,0 +1,110 @@
+import zlib
+from sqlalchemy import func, or_, insert, select
+from models import db, User, Job, JobMatch, JobMatchArchive, ResumeBlob
+from utils.matcher import rebuild_match_summary
+from utils.resume_store import COMPRESSION_LEVEL
+
+# Rough per-row cost of the fixed-width JobMatch columns plus row overhead
+MATCH_ROW_OVERHEAD = 64
+
+def _prunable_matches(min_percentage=None, jobs_before=None):
+    conditions = []
+    if min_percentage is not None:
+        conditions.append(func.coalesce(JobMatch.match_percentage, 0) < min_percentage)
+    if jobs_before is not None:
+        conditions.append(JobMatch.job_id.in_(select(Job.id).where(Job.created_at < jobs_before)))
+    if not conditions:
+        raise ValueError("Pass min_percentage and/or jobs_before")
+    return or_(*conditions)
+
+def prune_matches(min_percentage=None, jobs_before=None, archive=True, batch_size=1000):
+    """Remove JobMatch rows below min_percentage or for jobs posted before jobs_before
+
+    Works in batches of batch_size, one transaction each. With archive=True
+    a compact copy (ids, score, version) is kept in JobMatchArchive first.
+    Affected users' summaries are rebuilt. Returns rows removed, users
+    affected and an estimate of the bytes freed.
+    """
+    condition = _prunable_matches(min_percentage, jobs_before)
+    removed = 0
+    freed = 0
+    users = set()
+
+    while True:
+        batch = db.session.query(
+            JobMatch.id,
+            JobMatch.user_id,
+            func.coalesce(func.length(JobMatch.matched_skills), 0)
+            + func.coalesce(func.length(JobMatch.missing_skills), 0)
+            + func.coalesce(func.length(JobMatch.fit_summary), 0)
+        ).filter(condition).order_by(JobMatch.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        ids = [match_id for match_id, _, _ in batch]
+        if archive:
+            db.session.execute(insert(JobMatchArchive).from_select(
+                ['user_id', 'job_id', 'match_percentage', 'scorer_version', 'created_at'],
+                select(JobMatch.user_id, JobMatch.job_id, JobMatch.match_percentage,
+                       JobMatch.scorer_version, JobMatch.created_at).where(JobMatch.id.in_(ids))
+            ))
+        db.session.query(JobMatch).filter(JobMatch.id.in_(ids)).delete(synchronize_session=False)
+
+        batch_users = {user_id for _, user_id, _ in batch}
+        for user_id in batch_users:
+            rebuild_match_summary(user_id)
+        db.session.commit()
+
+        removed += len(batch)
+        freed += sum(size + MATCH_ROW_OVERHEAD for _, _, size in batch)
+        users |= batch_users
+
+    return {'rows': removed, 'users': len(users), 'bytes_freed': freed}
+
+def compact_resume_texts(batch_size=200):
+    """Move inline User.resume_text into compressed ResumeBlob rows
+
+    Returns users moved and the text bytes before and after compression.
+    """
+    moved = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    while True:
+        batch = db.session.query(User.id, User.resume_text).filter(
+            User.resume_text.isnot(None)
+        ).order_by(User.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        for user_id, resume_text in batch:
+            data = resume_text.encode('utf-8')
+            blob = db.session.get(ResumeBlob, user_id)
+            if blob is None:
+                # Keep a newer upload that already went to ResumeBlob
+                blob = ResumeBlob(user_id=user_id, compressed_text=zlib.compress(data, COMPRESSION_LEVEL), original_size=len(data))
+                db.session.add(blob)
+            bytes_before += len(data)
+            bytes_after += len(blob.compressed_text or b'')
+        db.session.query(User).filter(User.id.in_([user_id for user_id, _ in batch])).update(
+            {User.resume_text: None}, synchronize_session=False
+        )
+        db.session.commit()
+        moved += len(batch)
+
+    return {'users': moved, 'bytes_before': bytes_before, 'bytes_after': bytes_after}
+
+def vacuum_database():
+    """Return freed pages to the OS on SQLite (PostgreSQL relies on autovacuum)"""
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    db.session.commit()
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('VACUUM')
+    return True
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
@@ -0,0 +1,150 @@
+import re
+from sqlalchemy import text
+from models import db, Job
+
+# SQLite: external-content FTS5 table over job, kept in sync by triggers
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS job_fts USING fts5(
+        title, company, description, required_skills,
+        content='job', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_fts_insert AFTER INSERT ON job BEGIN
+        INSERT INTO job_fts(rowid, title, company, description, required_skills)
+        VALUES (new.id, new.title, new.company, new.description, new.required_skills);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_fts_delete AFTER DELETE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, company, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.company, old.description, old.required_skills);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS job_fts_update AFTER UPDATE ON job BEGIN
+        INSERT INTO job_fts(job_fts, rowid, title, company, description, required_skills)
+        VALUES ('delete', old.id, old.title, old.company, old.description, old.required_skills);
+        INSERT INTO job_fts(rowid, title, company, description, required_skills)
+        VALUES (new.id, new.title, new.company, new.description, new.required_skills);
+    END
+    """
+]
+
+# PostgreSQL: weighted generated tsvector column (maintained by the server
+# on every insert and update) with a GIN index
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE job ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(required_skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(company, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_job_search_vector ON job USING GIN (search_vector)"
+]
+
+# Both backends produce an unbounded relevance score r >= 0, normalized to
+# r / (r + 1) so it can be blended with match_percentage / 100
+SQLITE_SEARCH_SQL = """
+    SELECT job_fts.rowid AS job_id,
+           -bm25(job_fts, 10.0, 3.0, 1.0, 5.0) AS relevance,
+           COALESCE(job_match.match_percentage, 0) AS match_percentage
+    FROM job_fts
+    LEFT JOIN job_match ON job_match.job_id = job_fts.rowid AND job_match.user_id = :user_id
+    WHERE job_fts MATCH :query
+    ORDER BY (1 - :match_weight) * (relevance / (relevance + 1))
+             + :match_weight * COALESCE(job_match.match_percentage, 0) / 100.0 DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+SQLITE_COUNT_SQL = "SELECT COUNT(*) FROM job_fts WHERE job_fts MATCH :query"
+
+POSTGRES_SEARCH_SQL = """
+    SELECT job.id AS job_id,
+           ts_rank_cd(job.search_vector, query) AS relevance,
+           COALESCE(job_match.match_percentage, 0) AS match_percentage
+    FROM job
+    CROSS JOIN websearch_to_tsquery('english', :query) AS query
+    LEFT JOIN job_match ON job_match.job_id = job.id AND job_match.user_id = :user_id
+    WHERE job.search_vector @@ query
+    ORDER BY (1 - :match_weight) * ts_rank_cd(job.search_vector, query, 32)
+             + :match_weight * COALESCE(job_match.match_percentage, 0) / 100.0 DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+POSTGRES_COUNT_SQL = """
+    SELECT COUNT(*) FROM job
+    WHERE search_vector @@ websearch_to_tsquery('english', :query)
+"""
+
+def _dialect():
+    return db.engine.dialect.name
+
+def setup_search_index():
+    """Create the full-text index for the current backend if it is missing"""
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        existed = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_fts'"
+        )).first()
+        for statement in SQLITE_SEARCH_DDL:
+            db.session.execute(text(statement))
+        if not existed:
+            # Index the jobs that were inserted before the triggers existed
+            db.session.execute(text("INSERT INTO job_fts(job_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        for statement in POSTGRES_SEARCH_DDL:
+            db.session.execute(text(statement))
+    db.session.commit()
+
+def _fts5_query(query):
+    """Turn free text into an FTS5 query of quoted terms (implicit AND)
+
+    Only the last term is a prefix match, so a half-typed word still finds
+    results without every term paying for a prefix scan.
+    """
+    terms = [f'"{term}"' for term in re.findall(r'\w+', query.lower())]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+def search_jobs(query, page=1, per_page=20, user_id=None, match_weight=0.0):
+    """Full-text search over jobs, ranked by relevance
+
+    When user_id is given, relevance is blended with the user's stored
+    JobMatch.match_percentage using match_weight (0 = relevance only).
+    Returns (results, total) where results is a list of dicts with the Job,
+    its relevance and match_percentage, in rank order.
+    """
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        query = _fts5_query(query)
+        search_sql, count_sql = SQLITE_SEARCH_SQL, SQLITE_COUNT_SQL
+    elif dialect == 'postgresql':
+        search_sql, count_sql = POSTGRES_SEARCH_SQL, POSTGRES_COUNT_SQL
+    else:
+        raise ValueError(f"Full-text search is not supported on {dialect}")
+
+    if not query.strip():
+        return [], 0
+
+    page = max(1, page)
+    rows = db.session.execute(text(search_sql), {
+        'query': query,
+        'user_id': user_id or 0,
+        'match_weight': match_weight if user_id else 0.0,
+        'limit': per_page,
+        'offset': (page - 1) * per_page
+    }).all()
+    total = db.session.execute(text(count_sql), {'query': query}).scalar() or 0
+
+    jobs = {job.id: job for job in db.session.query(Job).filter(Job.id.in_([row.job_id for row in rows]))}
+    results = [
+        {'job': jobs[row.job_id], 'relevance': row.relevance, 'match_percentage': row.match_percentage}
+        for row in rows if row.job_id in jobs
+    ]
+    return results, total